@@ -12,12 +12,13 @@ import threading
 import glob
 import random
 import importlib
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QLabel, QPushButton, QTextEdit, QLineEdit,
                              QGroupBox, QGridLayout, QFrame, QSlider, QComboBox,
                              QTabWidget, QSplitter, QProgressBar)
 from PyQt5.QtCore import QTimer, pyqtSignal, Qt, QThread
-from PyQt5.QtGui import QFont, QPainter, QPen, QColor, QBrush, QPixmap, QImage
+from PyQt5.QtGui import QFont, QPainter, QPen, QColor, QBrush, QPixmap, QImage, QTextCursor
 
 # Add CARLA path - multiple potential locations
 carla_paths = [
@@ -68,6 +69,7 @@ except ImportError as e:
 from config import Config
 from utils.logger import Logger
 from gemini_agent import GeminiAgent
+from gemini_worker import GeminiWorker
 from ramn.can_simulation import VehicleCANSimulator
 
 class CameraWidget(QFrame):
@@ -648,6 +650,26 @@ class VehicleControlPanel(QGroupBox):
 class CARLA3DSimulation(QMainWindow):
     """Main 3D CARLA simulation window"""
     
+    ai_request = pyqtSignal(str, dict, dict)
+    
+    LOG_COLORS = {
+        "info": "blue",
+        "success": "green",
+        "warning": "orange",
+        "error": "red",
+        "command": "purple",
+        "ai": "darkgreen",
+        "nav": "brown"
+    }
+    # Opening tag per log type, formatted once
+    LOG_SPANS = {log_type: f'<span style="color: {color};">' for log_type, color in LOG_COLORS.items()}
+    LOG_SPAN_DEFAULT = '<span style="color: black;">'
+    LOG_FLUSH_INTERVAL = 50  # ms
+    AI_THREAD_STOP_TIMEOUT = 2000  # ms to wait for an in-flight Gemini request on close
+    # Whole-degree heading lookup tables for the 2D position update
+    _COS = tuple(math.cos(math.radians(d)) for d in range(360))
+    _SIN = tuple(math.sin(math.radians(d)) for d in range(360))
+    
     def __init__(self):
         super().__init__()
         self.logger = Logger.get_logger(__name__)
@@ -655,6 +677,12 @@ class CARLA3DSimulation(QMainWindow):
         # Initialize components
         self.gemini_agent = GeminiAgent()
         self.can_simulator = VehicleCANSimulator()
+        self._ai_thread = QThread()
+        self._ai_worker = GeminiWorker(self.gemini_agent)
+        self._ai_worker.moveToThread(self._ai_thread)
+        self.ai_request.connect(self._ai_worker.process)
+        self._ai_worker.response_ready.connect(self._on_ai_response)
+        self._ai_thread.start()
         self.carla_client = None
         self.carla_world = None
         self.vehicle = None
@@ -665,6 +693,13 @@ class CARLA3DSimulation(QMainWindow):
         self.vehicle_y = 200
         self.vehicle_heading = 0
         self.vehicle_speed = 0
+        self._vehicle_transform = None  # Latest CARLA transform, shared with the spectator timer
+        
+        # Activity log lines are buffered and appended in one batch
+        self._log_buffer = deque()
+        self._log_timer = QTimer()
+        self._log_timer.setSingleShot(True)
+        self._log_timer.timeout.connect(self._flush_log)
         
         self.init_ui()
         self.init_carla()
@@ -785,6 +820,7 @@ class CARLA3DSimulation(QMainWindow):
         status_grid = QGridLayout()
         
         self.status_labels = {}
+        self._status_texts = {}  # last text shown per status label
         status_items = [
             ("speed", "Speed: 0 km/h"),
             ("position", "Position: (300, 200)"),
@@ -965,10 +1001,12 @@ class CARLA3DSimulation(QMainWindow):
         if not self.vehicle:
             return
             
+        spectator = self.carla_world.get_spectator()
+        
         def update_spectator():
             if self.vehicle:
-                vehicle_transform = self.vehicle.get_transform()
-                spectator = self.carla_world.get_spectator()
+                # Reuse the transform update_simulation already fetched this frame
+                vehicle_transform = self._vehicle_transform or self.vehicle.get_transform()
                 
                 # Position camera above and behind vehicle for cinematic view
                 spectator_location = carla.Location(
@@ -1026,7 +1064,10 @@ class CARLA3DSimulation(QMainWindow):
             "traffic": {"vehicles_count": 3, "pedestrians_count": 2}
         }
         
-        response = self.gemini_agent.process_command(text, vehicle_status, environment_info)
+        self.ai_request.emit(text, vehicle_status, environment_info)
+    
+    def _on_ai_response(self, text, response):
+        """Handle a Gemini response delivered from the worker thread"""
         self.add_log("ai", f"🧠 AI Response: {response['response']}")
         
         if not response.get('clarification_needed', False):
@@ -1256,12 +1297,8 @@ class CARLA3DSimulation(QMainWindow):
             self.add_log("nav", f"🗺️ Navigating to: {destination}")
             self.execute_movement("forward", 35)
         elif action == "speed_change":
-            change_type = parameters.get('change_type', 'increase')
-            if change_type == 'increase':
-                new_speed = min(self.vehicle_speed + 20, 80)
-            else:
-                new_speed = max(self.vehicle_speed - 20, 0)
-            self.set_vehicle_speed(new_speed)
+            delta = 20 if parameters.get('change_type', 'increase') == 'increase' else -20
+            self.set_vehicle_speed(max(0, min(80, self.vehicle_speed + delta)))
         elif action == "turn":
             direction = parameters.get('direction', 'left')
             self.execute_turn(direction)
@@ -1275,10 +1312,10 @@ class CARLA3DSimulation(QMainWindow):
             speed_ms = speed / 3.6  # km/h to m/s
             pixel_speed = speed_ms * 5  # Scale for visualization
             
-            # Calculate new position
-            heading_rad = math.radians(self.vehicle_heading)
-            dx = pixel_speed * math.cos(heading_rad)
-            dy = pixel_speed * math.sin(heading_rad)
+            # Calculate new position (heading rounded to the nearest degree)
+            h = int(round(self.vehicle_heading)) % 360
+            dx = pixel_speed * self._COS[h]
+            dy = pixel_speed * self._SIN[h]
             
             # Update position with bounds checking
             new_x = self.vehicle_x + dx
@@ -1317,6 +1354,7 @@ class CARLA3DSimulation(QMainWindow):
                 # Get real vehicle state from CARLA
                 vehicle_transform = self.vehicle.get_transform()
                 vehicle_velocity = self.vehicle.get_velocity()
+                self._vehicle_transform = vehicle_transform
                 
                 # Update our display with real CARLA data
                 self.vehicle_x = vehicle_transform.location.x
@@ -1333,12 +1371,12 @@ class CARLA3DSimulation(QMainWindow):
                 
                 # Update status display with real CARLA data
                 status = self.can_simulator.get_vehicle_state()
-                self.status_labels["speed"].setText(f"⚡ Speed: {real_speed:.1f} km/h")
-                self.status_labels["position"].setText(f"📍 Position: ({self.vehicle_x:.0f}, {self.vehicle_y:.0f})")
-                self.status_labels["heading"].setText(f"🧭 Heading: {self.vehicle_heading:.0f}°")
-                self.status_labels["gear"].setText(f"⚙️ Gear: {status.get('gear', 'D')}")
-                self.status_labels["fuel"].setText(f"⛽ Fuel: {status.get('fuel_level', 1.0)*100:.0f}%")
-                self.status_labels["engine"].setText(f"🔥 Engine: {'RACING' if real_speed > 50 else 'CRUISING' if real_speed > 0 else 'IDLE'}")
+                self._set_status_text("speed", f"⚡ Speed: {real_speed:.1f} km/h")
+                self._set_status_text("position", f"📍 Position: ({self.vehicle_x:.0f}, {self.vehicle_y:.0f})")
+                self._set_status_text("heading", f"🧭 Heading: {self.vehicle_heading:.0f}°")
+                self._set_status_text("gear", f"⚙️ Gear: {status.get('gear', 'D')}")
+                self._set_status_text("fuel", f"⛽ Fuel: {status.get('fuel_level', 1.0)*100:.0f}%")
+                self._set_status_text("engine", f"🔥 Engine: {'RACING' if real_speed > 50 else 'CRUISING' if real_speed > 0 else 'IDLE'}")
                 
                 # Tick CARLA world for physics simulation
                 self.carla_world.tick()
@@ -1365,12 +1403,12 @@ class CARLA3DSimulation(QMainWindow):
         
         # Update status display
         status = self.can_simulator.get_vehicle_state()
-        self.status_labels["speed"].setText(f"⚡ Speed: {status.get('speed', 0):.1f} km/h")
-        self.status_labels["position"].setText(f"📍 Position: ({self.vehicle_x:.0f}, {self.vehicle_y:.0f})")
-        self.status_labels["heading"].setText(f"🧭 Heading: {self.vehicle_heading:.0f}°")
-        self.status_labels["gear"].setText(f"⚙️ Gear: {status.get('gear', 'P')}")
-        self.status_labels["fuel"].setText(f"⛽ Fuel: {status.get('fuel_level', 1.0)*100:.0f}%")
-        self.status_labels["engine"].setText(f"🔥 Engine: {'RACING' if status.get('speed', 0) > 50 else 'CRUISING' if status.get('speed', 0) > 0 else 'IDLE'}")
+        self._set_status_text("speed", f"⚡ Speed: {status.get('speed', 0):.1f} km/h")
+        self._set_status_text("position", f"📍 Position: ({self.vehicle_x:.0f}, {self.vehicle_y:.0f})")
+        self._set_status_text("heading", f"🧭 Heading: {self.vehicle_heading:.0f}°")
+        self._set_status_text("gear", f"⚙️ Gear: {status.get('gear', 'P')}")
+        self._set_status_text("fuel", f"⛽ Fuel: {status.get('fuel_level', 1.0)*100:.0f}%")
+        self._set_status_text("engine", f"🔥 Engine: {'RACING' if status.get('speed', 0) > 50 else 'CRUISING' if status.get('speed', 0) > 0 else 'IDLE'}")
     
     def _update_gaming_effects(self):
         """Update gaming visual effects (fallback mode only)"""
@@ -1388,26 +1426,34 @@ class CARLA3DSimulation(QMainWindow):
             self.vehicle_heading = np.degrees(time_factor + np.pi/2)
             self.vehicle_speed = 60 + 30 * np.sin(time_factor * 3)  # Racing speeds
     
+    def _set_status_text(self, key, text):
+        """Update a status label only when its text changes, avoiding a relayout"""
+        if self._status_texts.get(key) != text:
+            self._status_texts[key] = text
+            self.status_labels[key].setText(text)
+    
     def add_log(self, log_type, message):
-        """Add entry to activity log"""
+        """Queue an entry for the activity log"""
         timestamp = time.strftime("%H:%M:%S")
-        color_map = {
-            "info": "blue",
-            "success": "green", 
-            "warning": "orange",
-            "error": "red",
-            "command": "purple",
-            "ai": "darkgreen",
-            "nav": "brown"
-        }
-        
-        color = color_map.get(log_type, "black")
-        self.activity_log.append(f'<span style="color: {color};">[{timestamp}] {message}</span>')
-        
-        # Auto-scroll
-        self.activity_log.verticalScrollBar().setValue(
-            self.activity_log.verticalScrollBar().maximum()
-        )
+        span = self.LOG_SPANS.get(log_type, self.LOG_SPAN_DEFAULT)
+        self._log_buffer.append(f'{span}[{timestamp}] {message}</span>')
+        if not self._log_timer.isActive():
+            self._log_timer.start(self.LOG_FLUSH_INTERVAL)
+    
+    def _flush_log(self):
+        """Append all queued log entries with a single document edit"""
+        cursor = QTextCursor(self.activity_log.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        while self._log_buffer:
+            if not self.activity_log.document().isEmpty():
+                cursor.insertBlock()
+            cursor.insertHtml(self._log_buffer.popleft())
+        cursor.endEditBlock()
+        
+        # Auto-scroll: park the view's cursor at the end and let Qt scroll to it
+        self.activity_log.setTextCursor(cursor)
+        self.activity_log.ensureCursorVisible()
     
     def closeEvent(self, event):
         """Clean up CARLA 3D resources on close"""
@@ -1436,6 +1482,9 @@ class CARLA3DSimulation(QMainWindow):
         except Exception as e:
             print(f"Cleanup error: {e}")
         
+        self._ai_thread.quit()
+        if not self._ai_thread.wait(self.AI_THREAD_STOP_TIMEOUT):
+            self.logger.warning("Gemini request still running at close; not waiting for it")
         event.accept()
 
 def main():
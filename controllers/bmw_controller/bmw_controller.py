@@ -14,6 +14,16 @@ from typing import Dict, Any, Optional
 parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(parent_dir)
 
+# Compact encoder for the per-step status file (orjson when installed)
+try:
+    import orjson
+    _encode_status = orjson.dumps
+except ImportError:
+    _json_encode = json.JSONEncoder(separators=(',', ':')).encode
+    
+    def _encode_status(data: Dict[str, Any]) -> bytes:
+        return _json_encode(data).encode('utf-8')
+
 try:
     from vehicle import Driver
     WEBOTS_AVAILABLE = True
@@ -23,6 +33,15 @@ except ImportError:
     WEBOTS_AVAILABLE = False
     sys.exit(1)
 
+# Accepted command spellings, resolved with a single lookup
+_COMMAND_ALIASES = {
+    'forward': 'forward', 'move_forward': 'forward',
+    'backward': 'backward', 'move_backward': 'backward',
+    'left': 'left', 'turn_left': 'left',
+    'right': 'right', 'turn_right': 'right',
+    'stop': 'stop',
+}
+
 class BmwX5Controller:
     """BmwX5 vehicle controller for voice command system"""
     
@@ -54,6 +73,7 @@ class BmwX5Controller:
         self.command_file = os.path.join(parent_dir, "commands", "current_command.json")
         self.status_file = os.path.join(parent_dir, "commands", "vehicle_status.json")
         self.last_command_time = 0
+        self.command_poll_interval = 0.5  # seconds
         
         # Initialize sensors
         self._init_sensors()
@@ -62,6 +82,10 @@ class BmwX5Controller:
         self.driver.setCruisingSpeed(0.0)
         self.driver.setSteeringAngle(0.0)
         
+        # Last values sent to the driver, used to skip redundant calls
+        self._last_cruising_speed = 0.0
+        self._last_steering_angle = 0.0
+        
         print("✅ BmwX5 controller ready")
     
     def _init_sensors(self):
@@ -123,9 +147,12 @@ class BmwX5Controller:
         except Exception as e:
             print(f"❌ Sensor update error: {e}")
     
-    def update_status_file(self):
+    def update_status_file(self, timestamp: Optional[float] = None):
         """Write current vehicle status to file for overlay"""
         try:
+            if timestamp is None:
+                timestamp = time.time()
+            
             status_data = {
                 'connected': True,
                 'position': self.vehicle_state['position'],
@@ -134,14 +161,14 @@ class BmwX5Controller:
                 'gear': self.vehicle_state['gear'],
                 'target_speed': self.target_speed,
                 'steering_angle': self.steering_angle,
-                'timestamp': time.time()
+                'timestamp': timestamp
             }
             
             # Ensure commands directory exists
             os.makedirs(os.path.dirname(self.status_file), exist_ok=True)
             
-            with open(self.status_file, 'w') as f:
-                json.dump(status_data, f, indent=2)
+            with open(self.status_file, 'wb') as f:
+                f.write(_encode_status(status_data))
                 
         except Exception as e:
             print(f"❌ Status file update error: {e}")
@@ -193,43 +220,56 @@ class BmwX5Controller:
         except Exception as e:
             print(f"❌ Command processing error: {e}")
     
+    def _set_cruising_speed(self, speed: float):
+        """Send cruising speed to the driver only when it changes"""
+        if speed != self._last_cruising_speed:
+            self.driver.setCruisingSpeed(speed)
+            self._last_cruising_speed = speed
+    
+    def _set_steering_angle(self, angle: float):
+        """Send steering angle to the driver only when it changes"""
+        if angle != self._last_steering_angle:
+            self.driver.setSteeringAngle(angle)
+            self._last_steering_angle = angle
+    
     def process_command(self, command: str):
         """Process vehicle command"""
         command = command.lower().strip()
+        action = _COMMAND_ALIASES.get(command)
         
-        if command in ['forward', 'move_forward']:
+        if action == 'forward':
             self.target_speed = 30.0  # 30 km/h
             self.steering_angle = 0.0
-            self.driver.setCruisingSpeed(self.target_speed)
-            self.driver.setSteeringAngle(self.steering_angle)
+            self._set_cruising_speed(self.target_speed)
+            self._set_steering_angle(self.steering_angle)
             
-        elif command in ['backward', 'move_backward']:
+        elif action == 'backward':
             self.target_speed = -20.0  # Reverse at 20 km/h
             self.steering_angle = 0.0
-            self.driver.setCruisingSpeed(self.target_speed)
-            self.driver.setSteeringAngle(self.steering_angle)
+            self._set_cruising_speed(self.target_speed)
+            self._set_steering_angle(self.steering_angle)
             
-        elif command in ['left', 'turn_left']:
+        elif action == 'left':
             # Turn left while maintaining current speed
             self.steering_angle = -0.5  # Left turn
-            self.driver.setSteeringAngle(self.steering_angle)
+            self._set_steering_angle(self.steering_angle)
             if abs(self.current_speed) < 5:  # If nearly stopped, move forward
                 self.target_speed = 20.0
-                self.driver.setCruisingSpeed(self.target_speed)
+                self._set_cruising_speed(self.target_speed)
             
-        elif command in ['right', 'turn_right']:
+        elif action == 'right':
             # Turn right while maintaining current speed
             self.steering_angle = 0.5  # Right turn
-            self.driver.setSteeringAngle(self.steering_angle)
+            self._set_steering_angle(self.steering_angle)
             if abs(self.current_speed) < 5:  # If nearly stopped, move forward
                 self.target_speed = 20.0
-                self.driver.setCruisingSpeed(self.target_speed)
+                self._set_cruising_speed(self.target_speed)
             
-        elif command == 'stop':
+        elif action == 'stop':
             self.target_speed = 0.0
             self.steering_angle = 0.0
-            self.driver.setCruisingSpeed(self.target_speed)
-            self.driver.setSteeringAngle(self.steering_angle)
+            self._set_cruising_speed(self.target_speed)
+            self._set_steering_angle(self.steering_angle)
             
         else:
             print(f"⚠️ Unknown command: {command}")
@@ -241,19 +281,21 @@ class BmwX5Controller:
         # Create commands directory if it doesn't exist
         os.makedirs(os.path.dirname(self.command_file), exist_ok=True)
         
+        next_command_poll = 0.0
         while self.driver.step() != -1:
+            # Read the wall clock once per step
+            tick_time = time.time()
+            
             # Update sensors
             self.update_sensors()
             
             # Check for new commands (less frequently to avoid JSON errors)
-            if int(time.time() * 10) % 5 == 0:  # Check every 0.5 seconds
+            if tick_time >= next_command_poll:
                 self.check_for_commands()
+                next_command_poll = tick_time + self.command_poll_interval
             
-            # Update status file for overlay
-            self.update_status_file()
-            
-            # Small delay to prevent excessive file I/O
-            time.sleep(0.05)
+            # Update status file for overlay (driver.step() paces the loop)
+            self.update_status_file(tick_time)
 
 # Main execution
 if __name__ == "__main__":
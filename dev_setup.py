@@ -2,16 +2,26 @@
 Development utilities and scripts for CARLA Voice Commander
 """
 
+import importlib
+import shutil
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def install_dependencies():
     """Install required Python packages"""
     print("Installing dependencies...")
+    # Prefer uv (parallel resolver/downloads) when available, targeting this interpreter
+    uv = shutil.which("uv")
+    if uv:
+        cmd = [uv, "pip", "install", "--python", sys.executable, "-r", "requirements.txt"]
+    else:
+        cmd = [sys.executable, "-m", "pip", "install", "-r", "requirements.txt"]
+    
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        subprocess.check_call(cmd)
         print("Dependencies installed successfully!")
     except subprocess.CalledProcessError as e:
         print(f"Error installing dependencies: {e}")
@@ -57,9 +67,13 @@ def test_imports():
         ("carla", "CARLA simulator (optional for development)"),
     ]
     
-    for module, description in modules:
+    # Probe imports concurrently; results are reported in list order
+    with ThreadPoolExecutor(max_workers=len(modules)) as executor:
+        futures = [executor.submit(importlib.import_module, module) for module, _ in modules]
+    
+    for (module, description), future in zip(modules, futures):
         try:
-            __import__(module)
+            future.result()
             print(f"✅ {module}: Available")
         except ImportError:
             if module == "carla":
@@ -8,12 +8,15 @@ import os
 import time
 import math
 import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
-                             QWidget, QLabel, QPushButton, QTextEdit, QLineEdit,
+                             QWidget, QLabel, QPushButton, QListWidget, QListWidgetItem, QLineEdit,
                              QGroupBox, QGridLayout, QFrame, QSlider, QComboBox,
                              QTabWidget, QSplitter, QProgressBar)
-from PyQt5.QtCore import QTimer, pyqtSignal, Qt, QThread
-from PyQt5.QtGui import QFont, QPainter, QPen, QColor, QBrush, QPixmap, QImage
+from PyQt5.QtCore import QTimer, pyqtSignal, Qt, QThread, QRect, QRectF, QPoint
+from PyQt5.QtGui import QFont, QPainter, QPen, QColor, QBrush, QPixmap, QImage, QPolygon, QTransform, QStaticText
 
 # Add CARLA path
 carla_path = r"C:\Carla-0.10.0-Win64-Shipping\PythonAPI\carla"
@@ -33,31 +36,57 @@ except ImportError:
 from config import Config
 from utils.logger import Logger
 from gemini_agent import GeminiAgent
+from gemini_worker import GeminiWorker
 from ramn.can_simulation import VehicleCANSimulator
 
+def _carla_view(image):
+    """Zero-copy (height, width, 4) BGRA uint8 view of a CARLA camera image"""
+    return np.frombuffer(image.raw_data, dtype=np.uint8).reshape(image.height, image.width, 4)
+
 class CameraWidget(QFrame):
     """Widget for displaying CARLA camera feed"""
     
+    frame_ready = pyqtSignal()
+    
+    PLACEHOLDER_COLOR = QColor(50, 50, 50)
+    PLACEHOLDER_PEN = QPen(QColor(255, 255, 255), 2)
+    
     def __init__(self):
         super().__init__()
         self.setFixedSize(640, 480)
         self.setFrameStyle(QFrame.Box)
         self.image = None
         
+        # Single-slot latest frame handed from the CARLA sensor thread
+        self._pending_frame = None
+        self._frame_lock = threading.Lock()
+        self.frame_ready.connect(self._consume_frame)
+    
+    def submit_frame(self, image_data):
+        """CARLA sensor callback: keep only the newest frame and return immediately"""
+        with self._frame_lock:
+            notify = self._pending_frame is None
+            self._pending_frame = image_data
+        if notify:
+            self.frame_ready.emit()
+    
+    def _consume_frame(self):
+        """Decode the newest pending frame on the GUI thread"""
+        with self._frame_lock:
+            image_data = self._pending_frame
+            self._pending_frame = None
+        self.update_image(image_data)
+        
     def update_image(self, image_data):
         """Update camera image"""
         if image_data is not None and CARLA_AVAILABLE:
             try:
-                import numpy as np
-                # Convert CARLA image to QImage
-                array = np.frombuffer(image_data.raw_data, dtype=np.dtype("uint8"))
-                array = np.reshape(array, (image_data.height, image_data.width, 4))
-                array = array[:, :, :3]  # Remove alpha channel
-                array = array[:, :, ::-1]  # BGR to RGB
-                
-                height, width, channel = array.shape
-                bytes_per_line = 3 * width
-                q_image = QImage(array.data, width, height, bytes_per_line, QImage.Format_RGB888)
+                # CARLA's BGRA bytes are a little-endian 0xAARRGGBB word, i.e. what
+                # Format_RGB32 expects (alpha ignored), so wrap them without a copy.
+                # fromImage() copies into the pixmap while the view is still alive.
+                bgra = _carla_view(image_data)
+                height, width = bgra.shape[:2]
+                q_image = QImage(bgra.data, width, height, bgra.strides[0], QImage.Format_RGB32)
                 self.image = QPixmap.fromImage(q_image)
                 self.update()
             except Exception as e:
@@ -71,8 +100,8 @@ class CameraWidget(QFrame):
             painter.drawPixmap(self.rect(), self.image, self.image.rect())
         else:
             # Draw placeholder
-            painter.fillRect(self.rect(), QColor(50, 50, 50))
-            painter.setPen(QPen(QColor(255, 255, 255), 2))
+            painter.fillRect(self.rect(), self.PLACEHOLDER_COLOR)
+            painter.setPen(self.PLACEHOLDER_PEN)
             if CARLA_AVAILABLE:
                 painter.drawText(self.rect(), Qt.AlignCenter, "Camera Feed\n(Start CARLA server to connect)")
             else:
@@ -81,6 +110,53 @@ class CameraWidget(QFrame):
 class Enhanced3DMapWidget(QFrame):
     """Enhanced 3D-style map visualization"""
     
+    # Repaint regions for the dynamic parts of the map
+    HUD_RECT = QRect(0, 0, 260, 110)
+    VEHICLE_LOCAL_RECT = QRectF(-36, -11, 55, 22)  # body, shadow and speed lines before rotation
+    TRAIL_LENGTH = 50
+    HUD_BASELINES = (20, 40, 60, 80, 100)
+    ENVIRONMENT_TICK = 0.05  # seconds per traffic-light/clock tick
+    
+    # Paint resources, built once instead of on every frame
+    SKY_DAY = QColor(135, 206, 235)
+    SKY_TWILIGHT = QColor(255, 165, 0)
+    SKY_NIGHT = QColor(25, 25, 112)
+    ROAD_COLOR = QColor(60, 60, 60)
+    ROAD_BRUSH = QBrush(ROAD_COLOR)
+    LANE_COLOR = QColor(255, 255, 255)
+    LANE_DASH = 8  # dash and gap lengths match a 2px Qt.DashLine pen
+    LANE_GAP = 4
+    ROAD_EDGE_PEN = QPen(QColor(255, 255, 255), 3)
+    OUTLINE_PEN = QPen(QColor(0, 0, 0), 2)
+    BUILDING_BRUSHES = (
+        QBrush(QColor(100, 100, 120)), QBrush(QColor(120, 100, 100)),
+        QBrush(QColor(100, 120, 100)), QBrush(QColor(90, 90, 90)),
+    )
+    BUILDING_SHADOW_BRUSH = QBrush(QColor(30, 30, 30, 100))
+    POLE_BRUSH = QBrush(QColor(80, 80, 80))
+    HOUSING_BRUSH = QBrush(QColor(50, 50, 50))
+    LIGHT_GREEN, LIGHT_YELLOW, LIGHT_RED = 0, 1, 2  # light_state codes, in cycle order
+    LIGHT_OFF_BRUSH = QBrush(QColor(100, 100, 100))
+    # Top-to-bottom (red, yellow, green) bulb brushes for each light_state code
+    LIGHT_BULB_BRUSHES = (
+        (LIGHT_OFF_BRUSH, LIGHT_OFF_BRUSH, QBrush(QColor(0, 255, 0))),
+        (LIGHT_OFF_BRUSH, QBrush(QColor(255, 255, 0)), LIGHT_OFF_BRUSH),
+        (QBrush(QColor(255, 0, 0)), LIGHT_OFF_BRUSH, LIGHT_OFF_BRUSH),
+    )
+    TRAIL_FADE_STEPS = 5
+    # Oldest to newest band of the trail, fading in from faint to bright
+    TRAIL_PENS = tuple(
+        QPen(QColor(0, 255, 255, int(alpha)), 3)
+        for alpha in np.linspace(20, 200, TRAIL_FADE_STEPS, dtype=np.uint8)
+    )
+    VEHICLE_SHADOW_BRUSH = QBrush(QColor(0, 0, 0, 100))
+    VEHICLE_BODY_BRUSH = QBrush(QColor(255, 0, 0))
+    VEHICLE_BODY_PEN = QPen(QColor(200, 0, 0), 2)
+    VEHICLE_WINDOW_BRUSH = QBrush(QColor(150, 150, 255, 200))
+    HEADLIGHT_BRUSH = QBrush(QColor(255, 255, 255))
+    SPEED_LINE_PEN = QPen(QColor(255, 255, 0), 2)
+    HUD_PEN = QPen(QColor(255, 255, 255), 1)
+    
     def __init__(self):
         super().__init__()
         self.setFixedSize(600, 400)
@@ -91,37 +167,73 @@ class Enhanced3DMapWidget(QFrame):
         self.vehicle_y = 200
         self.vehicle_heading = 0
         self.vehicle_speed = 0
-        self.trail_points = []
+        self._vehicle_bounds = self._compute_vehicle_rect()
+        # Trail as a fixed-size ring buffer of integer points
+        self._trail = np.zeros((self.TRAIL_LENGTH, 2), dtype=np.int32)
+        self._trail_head = 0
+        self._trail_count = 0
+        self._trail_polygon = QPolygon()
+        # HUD lines, re-laid out only when the displayed values change
+        self._hud_key = None
+        self._hud_lines = []
         
         # Environment
-        self.buildings = self._generate_3d_buildings()
+        self._window_tile = self._build_window_tile()
+        self._hdash_tile, self._vdash_tile = self._build_lane_dash_tiles()
+        self._generate_3d_buildings()
         self.roads = self._generate_road_network()
-        self.traffic_lights = self._generate_traffic_system()
+        self._generate_traffic_system()
         self.weather = {"time": 12.0, "clouds": 0.3, "rain": 0.0}
         
+        # Pre-rendered sky/roads/buildings, rebuilt only when the sky color changes
+        self._static_layer = None
+        self._static_sky_color = None
+        
         # Animation
+        self._last_environment_update = time.monotonic()
         self.animation_timer = QTimer()
         self.animation_timer.timeout.connect(self.update_environment)
-        self.animation_timer.start(50)
-        
-    def _generate_3d_buildings(self):
-        """Generate 3D-style buildings"""
-        import random
-        buildings = []
-        for _ in range(25):
-            x = random.randint(50, 550)
-            y = random.randint(50, 350)
-            w = random.randint(40, 80)
-            h = random.randint(40, 80)
-            height = random.randint(3, 8)
-            buildings.append({
-                "x": x, "y": y, "width": w, "height": h,
-                "building_height": height, "color": random.choice([
-                    QColor(100, 100, 120), QColor(120, 100, 100), 
-                    QColor(100, 120, 100), QColor(90, 90, 90)
-                ])
-            })
-        return buildings
+        self.animation_timer.start(500)
+        
+    @classmethod
+    def _build_window_tile(cls):
+        """One 15x20 window cell (8x12 window with a 2px outline) on a transparent tile"""
+        tile = QPixmap(15, 20)
+        tile.fill(Qt.transparent)
+        painter = QPainter(tile)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(cls.OUTLINE_PEN)
+        painter.setBrush(QBrush(QColor(255, 255, 200, 150)))
+        painter.drawRect(1, 1, 8, 12)
+        painter.end()
+        return tile
+    
+    @classmethod
+    def _build_lane_dash_tiles(cls):
+        """One dash-plus-gap period of lane marking, horizontal and vertical"""
+        period = cls.LANE_DASH + cls.LANE_GAP
+        hdash = QPixmap(period, 2)
+        hdash.fill(Qt.transparent)
+        painter = QPainter(hdash)
+        painter.fillRect(0, 0, cls.LANE_DASH, 2, cls.LANE_COLOR)
+        painter.end()
+        vdash = hdash.transformed(QTransform().rotate(90))
+        return hdash, vdash
+    
+    def _generate_3d_buildings(self, count=25):
+        """Generate 3D-style buildings as parallel arrays (one entry per building)"""
+        rng = np.random.default_rng()
+        self.building_x = rng.integers(50, 551, count)
+        self.building_y = rng.integers(50, 351, count)
+        self.building_w = rng.integers(40, 81, count)
+        self.building_h = rng.integers(40, 81, count)
+        self.building_bh = rng.integers(3, 9, count)  # storeys, drives the shadow offset
+        self.building_color_idx = rng.integers(0, len(self.BUILDING_BRUSHES), count)
+        
+        # Derived once: shadow offset and the 15x20 window grid that fits inside
+        self.building_shadow = self.building_bh * 2
+        self.building_window_cols = (self.building_w + 2) // 15
+        self.building_window_rows = (self.building_h - 1) // 20
     
     def _generate_road_network(self):
         """Generate complex road network"""
@@ -136,57 +248,124 @@ class Enhanced3DMapWidget(QFrame):
         ]
     
     def _generate_traffic_system(self):
-        """Generate intelligent traffic light system"""
-        return [
-            {"x": 280, "y": 180, "state": "green", "timer": 0, "cycle": 120},
-            {"x": 320, "y": 220, "state": "red", "timer": 60, "cycle": 120},
-            {"x": 130, "y": 180, "state": "yellow", "timer": 90, "cycle": 120},
-            {"x": 470, "y": 220, "state": "green", "timer": 30, "cycle": 120},
-        ]
+        """Generate intelligent traffic light system as parallel arrays"""
+        self.light_x = np.array([280, 320, 130, 470], dtype=np.int32)
+        self.light_y = np.array([180, 220, 180, 220], dtype=np.int32)
+        self.light_state = np.array(
+            [self.LIGHT_GREEN, self.LIGHT_RED, self.LIGHT_YELLOW, self.LIGHT_GREEN], dtype=np.int8
+        )
+        self.light_timer = np.array([0, 60, 90, 30], dtype=np.float64)
+        self.light_cycle = np.full(self.light_x.size, 120, dtype=np.float64)
+        # Lights never move, so their repaint rects are fixed
+        self._light_rects = tuple(
+            QRect(x - 10, y - 15, 20, 30) for x, y in zip(self.light_x.tolist(), self.light_y.tolist())
+        )
     
     def update_vehicle_state(self, x, y, heading, speed):
         """Update vehicle state with trail"""
+        # A parked vehicle neither extends the trail nor needs a repaint
+        if (x, y, heading, speed) == (self.vehicle_x, self.vehicle_y, self.vehicle_heading, self.vehicle_speed):
+            return
+        dirty = self._vehicle_rect().united(self._trail_rect())
+        
         self.vehicle_x = x
         self.vehicle_y = y
         self.vehicle_heading = heading
         self.vehicle_speed = speed
+        self._vehicle_bounds = self._compute_vehicle_rect()
         
         # Add to trail
-        self.trail_points.append((x, y))
-        if len(self.trail_points) > 50:
-            self.trail_points.pop(0)
+        self._trail[self._trail_head] = (int(x), int(y))
+        self._trail_head = (self._trail_head + 1) % self.TRAIL_LENGTH
+        self._trail_count = min(self._trail_count + 1, self.TRAIL_LENGTH)
+        self._trail_polygon = self._build_trail_polygon()
         
-        self.update()
+        dirty = dirty.united(self._vehicle_rect()).united(self._trail_rect())
+        self.update(dirty.united(self.HUD_RECT))
+    
+    def _compute_vehicle_rect(self):
+        """Bounding rect of the vehicle drawing at its current pose"""
+        transform = QTransform().translate(self.vehicle_x, self.vehicle_y).rotate(self.vehicle_heading)
+        return transform.mapRect(self.VEHICLE_LOCAL_RECT).toAlignedRect().adjusted(-2, -2, 2, 2)
+    
+    def _vehicle_rect(self):
+        """Bounding rect of the vehicle drawing"""
+        return self._vehicle_bounds
+    
+    def _build_trail_polygon(self):
+        """Trail points in oldest-to-newest order"""
+        if self._trail_count < self.TRAIL_LENGTH:
+            points = self._trail[:self._trail_count]
+        else:
+            points = np.concatenate((self._trail[self._trail_head:], self._trail[:self._trail_head]))
+        return QPolygon([QPoint(x, y) for x, y in points.tolist()])
+    
+    def _trail_rect(self):
+        """Bounding rect of the vehicle trail"""
+        if self._trail_polygon.size() < 2:
+            return QRect()
+        return self._trail_polygon.boundingRect().adjusted(-3, -3, 3, 3)
     
     def update_environment(self):
         """Update dynamic environment elements"""
-        # Update traffic lights
-        for light in self.traffic_lights:
-            light["timer"] += 1
-            if light["timer"] >= light["cycle"]:
-                light["timer"] = 0
-                # Cycle through states
-                if light["state"] == "green":
-                    light["state"] = "yellow"
-                elif light["state"] == "yellow":
-                    light["state"] = "red"
-                else:
-                    light["state"] = "green"
+        # Advance by real elapsed time so the tick rate can stay low
+        now = time.monotonic()
+        ticks = (now - self._last_environment_update) / self.ENVIRONMENT_TICK
+        self._last_environment_update = now
+        
+        # Update traffic lights: green -> yellow -> red -> green
+        self.light_timer += ticks
+        expired = self.light_timer >= self.light_cycle
+        if expired.any():
+            self.light_timer[expired] %= self.light_cycle[expired]
+            self.light_state[expired] = (self.light_state[expired] + 1) % 3
+            for i in np.flatnonzero(expired).tolist():
+                self.update(self._light_rects[i])
         
         # Update weather
-        self.weather["time"] += 0.01
+        self.weather["time"] += 0.01 * ticks
         if self.weather["time"] >= 24:
             self.weather["time"] = 0
-            
-        self.update()
+        
+        # Sky change needs the whole static layer; otherwise only the HUD clock moved
+        if self._get_sky_color() != self._static_sky_color:
+            self.update()
+        else:
+            self.update(self.HUD_RECT)
     
     def paintEvent(self, event):
         """Paint enhanced 3D-style visualization"""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
         # Sky gradient based on time
         sky_color = self._get_sky_color()
+        if self._static_layer is None or sky_color != self._static_sky_color:
+            self._render_static_layer(sky_color)
+        
+        region = event.region()
+        # Antialiasing is enabled only for the round and rotated shapes that need it
+        painter = QPainter(self)
+        painter.drawPixmap(region.boundingRect(), self._static_layer, region.boundingRect())
+        
+        # Draw traffic light bulbs
+        painter.setPen(self.OUTLINE_PEN)
+        self._draw_traffic_lights(painter, region)
+        
+        # Draw vehicle trail
+        if region.intersects(self._trail_rect()):
+            self._draw_vehicle_trail(painter)
+        
+        # Draw vehicle with 3D effect
+        if region.intersects(self._vehicle_rect()):
+            self._draw_vehicle_3d(painter)
+        
+        # Draw HUD
+        if region.intersects(self.HUD_RECT):
+            self._draw_hud(painter)
+    
+    def _render_static_layer(self, sky_color):
+        """Render sky, roads, buildings and traffic light housings into a pixmap"""
+        layer = QPixmap(self.size())
+        painter = QPainter(layer)  # axis-aligned shapes only, no antialiasing needed
+        
         painter.fillRect(self.rect(), sky_color)
         
         # Draw roads with 3D effect
@@ -195,143 +374,148 @@ class Enhanced3DMapWidget(QFrame):
         # Draw buildings with 3D effect
         self._draw_buildings_3d(painter)
         
-        # Draw traffic lights
-        self._draw_traffic_lights(painter)
+        # Draw traffic light poles and housings
+        self._draw_traffic_light_housings(painter)
         
-        # Draw vehicle trail
-        self._draw_vehicle_trail(painter)
-        
-        # Draw vehicle with 3D effect
-        self._draw_vehicle_3d(painter)
+        # Static HUD footer
+        painter.setPen(self.HUD_PEN)
+        if CARLA_AVAILABLE:
+            painter.drawText(10, 380, "✅ CARLA Ready (Start server to connect)")
+        else:
+            painter.drawText(10, 380, "⚠️ CARLA Simulation Mode")
         
-        # Draw HUD
-        self._draw_hud(painter)
+        painter.end()
+        self._static_layer = layer
+        self._static_sky_color = sky_color
     
     def _get_sky_color(self):
         """Get sky color based on time of day"""
         time_norm = (self.weather["time"] % 24) / 24
         if 0.25 <= time_norm <= 0.75:  # Day
-            return QColor(135, 206, 235)
+            return self.SKY_DAY
         elif 0.75 < time_norm <= 0.9 or 0.1 <= time_norm < 0.25:  # Sunset/sunrise
-            return QColor(255, 165, 0)
+            return self.SKY_TWILIGHT
         else:  # Night
-            return QColor(25, 25, 112)
+            return self.SKY_NIGHT
     
     def _draw_roads_3d(self, painter):
         """Draw roads with 3D perspective"""
-        painter.setBrush(QBrush(QColor(60, 60, 60)))
+        painter.setBrush(self.ROAD_BRUSH)
         
         for road in self.roads:
             if road["type"] == "horizontal":
                 # Main road surface
-                painter.fillRect(0, road["y"] - road["width"]//2, 600, road["width"], QColor(60, 60, 60))
+                painter.fillRect(0, road["y"] - road["width"]//2, 600, road["width"], self.ROAD_COLOR)
                 
                 # Lane markings
-                painter.setPen(QPen(QColor(255, 255, 255), 2, Qt.DashLine))
                 for i in range(1, road["lanes"]):
                     y = road["y"] - road["width"]//2 + (road["width"] * i // road["lanes"])
-                    painter.drawLine(0, y, 600, y)
+                    painter.drawTiledPixmap(QRect(0, y - 1, 600, 2), self._hdash_tile)
                 
                 # Road edges
-                painter.setPen(QPen(QColor(255, 255, 255), 3))
+                painter.setPen(self.ROAD_EDGE_PEN)
                 painter.drawLine(0, road["y"] - road["width"]//2, 600, road["y"] - road["width"]//2)
                 painter.drawLine(0, road["y"] + road["width"]//2, 600, road["y"] + road["width"]//2)
                 
             else:  # vertical
-                painter.fillRect(road["x"] - road["width"]//2, 0, road["width"], 400, QColor(60, 60, 60))
+                painter.fillRect(road["x"] - road["width"]//2, 0, road["width"], 400, self.ROAD_COLOR)
                 
-                painter.setPen(QPen(QColor(255, 255, 255), 2, Qt.DashLine))
                 for i in range(1, road["lanes"]):
                     x = road["x"] - road["width"]//2 + (road["width"] * i // road["lanes"])
-                    painter.drawLine(x, 0, x, 400)
+                    painter.drawTiledPixmap(QRect(x - 1, 0, 2, 400), self._vdash_tile)
                 
-                painter.setPen(QPen(QColor(255, 255, 255), 3))
+                painter.setPen(self.ROAD_EDGE_PEN)
                 painter.drawLine(road["x"] - road["width"]//2, 0, road["x"] - road["width"]//2, 400)
                 painter.drawLine(road["x"] + road["width"]//2, 0, road["x"] + road["width"]//2, 400)
     
     def _draw_buildings_3d(self, painter):
         """Draw buildings with 3D effect"""
-        for building in self.buildings:
+        # tolist() once so QPainter receives plain ints
+        buildings = zip(
+            self.building_x.tolist(), self.building_y.tolist(),
+            self.building_w.tolist(), self.building_h.tolist(),
+            self.building_shadow.tolist(), self.building_color_idx.tolist(),
+            self.building_window_cols.tolist(), self.building_window_rows.tolist(),
+        )
+        for x, y, w, h, shadow_offset, color_idx, columns, rows in buildings:
             # Building shadow (3D effect)
-            shadow_offset = building["building_height"] * 2
-            painter.setBrush(QBrush(QColor(30, 30, 30, 100)))
-            painter.drawRect(
-                building["x"] + shadow_offset, building["y"] + shadow_offset,
-                building["width"], building["height"]
-            )
+            painter.setBrush(self.BUILDING_SHADOW_BRUSH)
+            painter.drawRect(x + shadow_offset, y + shadow_offset, w, h)
             
             # Main building
-            painter.setBrush(QBrush(building["color"]))
-            painter.setPen(QPen(QColor(0, 0, 0), 2))
-            painter.drawRect(building["x"], building["y"], building["width"], building["height"])
-            
-            # Building top (3D effect)
-            painter.setBrush(QBrush(building["color"].lighter(120)))
+            painter.setBrush(self.BUILDING_BRUSHES[color_idx])
+            painter.setPen(self.OUTLINE_PEN)
+            painter.drawRect(x, y, w, h)
             
-            # Windows
-            painter.setBrush(QBrush(QColor(255, 255, 200, 150)))
-            for i in range(2, building["width"] - 10, 15):
-                for j in range(10, building["height"] - 10, 20):
-                    painter.drawRect(building["x"] + i, building["y"] + j, 8, 12)
-    
-    def _draw_traffic_lights(self, painter):
-        """Draw traffic lights"""
-        for light in self.traffic_lights:
+            # Windows: one tiled blit covering the same 15x20 grid
+            if columns and rows:
+                painter.drawTiledPixmap(x + 1, y + 9, columns * 15, rows * 20, self._window_tile)
+    
+    def _draw_traffic_light_housings(self, painter):
+        """Draw traffic light poles and housings"""
+        for x, y in zip(self.light_x.tolist(), self.light_y.tolist()):
             # Traffic light pole
-            painter.setBrush(QBrush(QColor(80, 80, 80)))
-            painter.drawRect(light["x"]-2, light["y"]-15, 4, 30)
+            painter.setBrush(self.POLE_BRUSH)
+            painter.drawRect(x-2, y-15, 4, 30)
             
             # Light housing
-            painter.setBrush(QBrush(QColor(50, 50, 50)))
-            painter.drawRect(light["x"]-8, light["y"]-12, 16, 24)
-            
-            # Light states
-            colors = {"red": QColor(255, 0, 0), "yellow": QColor(255, 255, 0), "green": QColor(0, 255, 0)}
+            painter.setBrush(self.HOUSING_BRUSH)
+            painter.drawRect(x-8, y-12, 16, 24)
+    
+    def _draw_traffic_lights(self, painter, region):
+        """Draw traffic light bulbs"""
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        lights = zip(self._light_rects, self.light_x.tolist(), self.light_y.tolist(), self.light_state.tolist())
+        for rect, x, y, state in lights:
+            if not region.intersects(rect):
+                continue
             
-            for i, state in enumerate(["red", "yellow", "green"]):
-                y_offset = light["y"] - 8 + i * 8
-                if light["state"] == state:
-                    painter.setBrush(QBrush(colors[state]))
-                else:
-                    painter.setBrush(QBrush(QColor(100, 100, 100)))
-                painter.drawEllipse(light["x"]-3, y_offset, 6, 6)
+            # Red, yellow and green bulbs from top to bottom
+            for i, brush in enumerate(self.LIGHT_BULB_BRUSHES[state]):
+                painter.setBrush(brush)
+                painter.drawEllipse(x-3, y - 8 + i * 8, 6, 6)
+        painter.setRenderHint(QPainter.Antialiasing, False)
     
     def _draw_vehicle_trail(self, painter):
         """Draw vehicle movement trail"""
-        if len(self.trail_points) > 1:
-            painter.setPen(QPen(QColor(0, 255, 255, 100), 3))
-            for i in range(1, len(self.trail_points)):
-                x1, y1 = self.trail_points[i-1]
-                x2, y2 = self.trail_points[i]
-                painter.drawLine(int(x1), int(y1), int(x2), int(y2))
+        count = self._trail_polygon.size()
+        if count < 2:
+            return
+        # One polyline per alpha band; neighbouring bands share their end point
+        bounds = np.linspace(0, count - 1, self.TRAIL_FADE_STEPS + 1).astype(int).tolist()
+        for pen, start, end in zip(self.TRAIL_PENS, bounds, bounds[1:]):
+            if end > start:
+                painter.setPen(pen)
+                painter.drawPolyline(self._trail_polygon.mid(start, end - start + 1))
     
     def _draw_vehicle_3d(self, painter):
         """Draw vehicle with 3D effect"""
         painter.save()
+        painter.setRenderHint(QPainter.Antialiasing, True)
         painter.translate(self.vehicle_x, self.vehicle_y)
         painter.rotate(self.vehicle_heading)
         
-        # Vehicle shadow
-        painter.setBrush(QBrush(QColor(0, 0, 0, 100)))
+        # Vehicle shadow and body share one outline pen
+        painter.setPen(self.VEHICLE_BODY_PEN)
+        painter.setBrush(self.VEHICLE_SHADOW_BRUSH)
         painter.drawRect(-18, -10, 36, 20)
         
         # Main vehicle body
-        painter.setBrush(QBrush(QColor(255, 0, 0)))
-        painter.setPen(QPen(QColor(200, 0, 0), 2))
+        painter.setBrush(self.VEHICLE_BODY_BRUSH)
         painter.drawRect(-15, -8, 30, 16)
         
         # Vehicle windows
-        painter.setBrush(QBrush(QColor(150, 150, 255, 200)))
+        painter.setBrush(self.VEHICLE_WINDOW_BRUSH)
         painter.drawRect(-10, -6, 20, 12)
         
         # Headlights
-        painter.setBrush(QBrush(QColor(255, 255, 255)))
+        painter.setBrush(self.HEADLIGHT_BRUSH)
         painter.drawEllipse(12, -6, 4, 4)
         painter.drawEllipse(12, 2, 4, 4)
         
         # Speed indicator
         if self.vehicle_speed > 0:
-            painter.setPen(QPen(QColor(255, 255, 0), 2))
+            painter.setPen(self.SPEED_LINE_PEN)
             for i in range(3):
                 painter.drawLine(-20 - i*5, 0, -25 - i*5, 0)
         
@@ -339,23 +523,47 @@ class Enhanced3DMapWidget(QFrame):
     
     def _draw_hud(self, painter):
         """Draw heads-up display"""
-        painter.setPen(QPen(QColor(255, 255, 255), 1))
-        painter.drawText(10, 20, f"🌍 Enhanced 3D CARLA Simulation")
-        painter.drawText(10, 40, f"⏰ Time: {self.weather['time']:.1f}:00")
-        painter.drawText(10, 60, f"🚗 Speed: {self.vehicle_speed:.1f} km/h")
-        painter.drawText(10, 80, f"📍 Pos: ({self.vehicle_x:.0f}, {self.vehicle_y:.0f})")
-        painter.drawText(10, 100, f"🧭 Heading: {self.vehicle_heading:.0f}°")
-        
-        if CARLA_AVAILABLE:
-            painter.drawText(10, 380, "✅ CARLA Ready (Start server to connect)")
-        else:
-            painter.drawText(10, 380, "⚠️ CARLA Simulation Mode")
+        key = (round(self.weather['time'], 1), round(self.vehicle_speed, 1),
+               round(self.vehicle_x), round(self.vehicle_y), round(self.vehicle_heading))
+        if key != self._hud_key:
+            self._hud_key = key
+            self._hud_lines = [self._static_text(text) for text in (
+                "🌍 Enhanced 3D CARLA Simulation",
+                f"⏰ Time: {key[0]:.1f}:00",
+                f"🚗 Speed: {key[1]:.1f} km/h",
+                f"📍 Pos: ({key[2]}, {key[3]})",
+                f"🧭 Heading: {key[4]}°",
+            )]
+        
+        painter.setPen(self.HUD_PEN)
+        # drawStaticText positions the top-left corner, drawText the baseline
+        ascent = painter.fontMetrics().ascent()
+        for baseline, line in zip(self.HUD_BASELINES, self._hud_lines):
+            painter.drawStaticText(10, baseline - ascent, line)
+    
+    @staticmethod
+    def _static_text(text):
+        static_text = QStaticText(text)
+        static_text.setTextFormat(Qt.PlainText)
+        return static_text
 
 class VehicleControlPanel(QGroupBox):
     """Advanced vehicle control panel"""
     
     vehicle_command = pyqtSignal(dict)
     
+    # Shared, read-only command dicts emitted by the quick-control buttons
+    QUICK_CONTROLS = (
+        ("⬆️ Forward", {"action": "forward", "speed": 40}),
+        ("⬇️ Reverse", {"action": "reverse", "speed": 20}),
+        ("⬅️ Turn Left", {"action": "turn", "direction": "left"}),
+        ("➡️ Turn Right", {"action": "turn", "direction": "right"}),
+        ("🛑 Emergency Stop", {"action": "emergency_stop"}),
+        ("🅿️ Park", {"action": "park"}),
+        ("🏎️ Sport Mode", {"action": "sport_mode"}),
+        ("🐌 Eco Mode", {"action": "eco_mode"}),
+    )
+    
     def __init__(self):
         super().__init__("🎮 Enhanced Vehicle Control")
         self.init_ui()
@@ -386,18 +594,7 @@ class VehicleControlPanel(QGroupBox):
         
         # Quick controls
         quick_layout = QGridLayout()
-        controls = [
-            ("⬆️ Forward", {"action": "forward", "speed": 40}),
-            ("⬇️ Reverse", {"action": "reverse", "speed": 20}),
-            ("⬅️ Turn Left", {"action": "turn", "direction": "left"}),
-            ("➡️ Turn Right", {"action": "turn", "direction": "right"}),
-            ("🛑 Emergency Stop", {"action": "emergency_stop"}),
-            ("🅿️ Park", {"action": "park"}),
-            ("🏎️ Sport Mode", {"action": "sport_mode"}),
-            ("🐌 Eco Mode", {"action": "eco_mode"})
-        ]
-        
-        for i, (label, cmd) in enumerate(controls):
+        for i, (label, cmd) in enumerate(self.QUICK_CONTROLS):
             btn = QPushButton(label)
             btn.clicked.connect(lambda checked, command=cmd: self.vehicle_command.emit(command))
             quick_layout.addWidget(btn, i // 4, i % 4)
@@ -480,6 +677,30 @@ class VehicleControlPanel(QGroupBox):
 class Enhanced3DSimulation(QMainWindow):
     """Main enhanced 3D simulation window"""
     
+    ai_request = pyqtSignal(str, dict, dict)
+    
+    LOG_COLORS = {
+        "info": "blue",
+        "success": "green",
+        "warning": "orange",
+        "error": "red",
+        "command": "purple",
+        "ai": "darkgreen",
+        "nav": "brown"
+    }
+    # Foreground brush per log type, built once
+    LOG_BRUSHES = {log_type: QBrush(QColor(color)) for log_type, color in LOG_COLORS.items()}
+    LOG_BRUSH_DEFAULT = QBrush(QColor("black"))
+    LOG_FLUSH_INTERVAL = 200  # ms
+    AI_THREAD_STOP_TIMEOUT = 2000  # ms to wait for an in-flight Gemini request on close
+    LOG_MAX_LINES = 200  # ring size; oldest entries are dropped past this
+    STATUS_IDLE_INTERVAL = 200  # ms, 5 Hz
+    STATUS_ACTIVE_INTERVAL = 33  # ms, ~30 Hz right after a command
+    STATUS_BOOST_DURATION = 2.0  # seconds
+    # Whole-degree heading lookup tables for the 2D position update
+    _COS = tuple(math.cos(math.radians(d)) for d in range(360))
+    _SIN = tuple(math.sin(math.radians(d)) for d in range(360))
+    
     def __init__(self):
         super().__init__()
         self.logger = Logger.get_logger(__name__)
@@ -487,6 +708,14 @@ class Enhanced3DSimulation(QMainWindow):
         # Initialize components
         self.gemini_agent = GeminiAgent()
         self.can_simulator = VehicleCANSimulator()
+        
+        # Gemini requests are answered on a worker thread and delivered back by signal
+        self._ai_thread = QThread()
+        self._ai_worker = GeminiWorker(self.gemini_agent)
+        self._ai_worker.moveToThread(self._ai_thread)
+        self.ai_request.connect(self._ai_worker.process)
+        self._ai_worker.response_ready.connect(self._on_ai_response)
+        self._ai_thread.start()
         self.carla_client = None
         self.carla_world = None
         self.vehicle = None
@@ -497,16 +726,47 @@ class Enhanced3DSimulation(QMainWindow):
         self.vehicle_y = 200
         self.vehicle_heading = 0
         self.vehicle_speed = 0
+        self._steering_reset_at = 0.0  # monotonic deadline for centering the wheel, 0 when idle
+        self._last_control = None  # (throttle, brake, steer) last sent to CARLA
+        # apply_control is a blocking RPC; one worker keeps the calls in order
+        self._control_executor = ThreadPoolExecutor(max_workers=1)
+        
+        # Command action -> handler; unknown actions are only logged
+        self._action_dispatch = {
+            "ai_command": lambda c: self.process_ai_command(c["text"]),
+            "forward": lambda c: self.execute_movement("forward", c.get("speed", 40)),
+            "reverse": lambda c: self.execute_movement("reverse", c.get("speed", 20)),
+            "turn": lambda c: self.execute_turn(c["direction"]),
+            "emergency_stop": lambda c: self.execute_emergency_stop(),
+            "park": lambda c: self.execute_parking(),
+            "set_speed": lambda c: self.set_vehicle_speed(c["speed"]),
+            "set_steering": lambda c: self.set_vehicle_steering(c["angle"]),
+            "set_weather": lambda c: self.set_weather(c["weather"]),
+        }
+        
+        # Activity log lines are buffered and appended in one batch
+        self._log_buffer = deque()
+        self._log_timer = QTimer()
+        self._log_timer.setSingleShot(True)
+        self._log_timer.timeout.connect(self._flush_log)
         
         self.init_ui()
         self.init_carla()
-        self.can_simulator.start()
+        # The CAN simulation is ticked from update_simulation rather than
+        # running its own ECU threads next to the GUI
+        self._last_simulation_update = time.monotonic()
         
         # Update timer
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_simulation)
         self.update_timer.start(50)  # 20 FPS
         
+        # Status labels refresh slowly unless a command was just issued
+        self._status_boost_until = 0.0
+        self._status_timer = QTimer()
+        self._status_timer.timeout.connect(self.update_status_display)
+        self._status_timer.start(self.STATUS_IDLE_INTERVAL)
+        
     def init_ui(self):
         """Initialize enhanced UI"""
         self.setWindowTitle("🚗 Enhanced 3D CARLA Vehicle Simulation - Professional Edition")
@@ -557,6 +817,7 @@ class Enhanced3DSimulation(QMainWindow):
         status_grid = QGridLayout()
         
         self.status_labels = {}
+        self._status_texts = {}  # last text shown per status label
         status_items = [
             ("speed", "Speed: 0 km/h"),
             ("position", "Position: (300, 200)"),
@@ -577,9 +838,9 @@ class Enhanced3DSimulation(QMainWindow):
         status_layout.addWidget(status_widget)
         
         # Activity log
-        self.activity_log = QTextEdit()
+        self.activity_log = QListWidget()
         self.activity_log.setMaximumHeight(200)
-        self.activity_log.setReadOnly(True)
+        self.activity_log.setUniformItemSizes(True)
         status_layout.addWidget(QLabel("Activity Log:"))
         status_layout.addWidget(self.activity_log)
         
@@ -633,7 +894,7 @@ class Enhanced3DSimulation(QMainWindow):
                 self.camera_sensor = self.carla_world.spawn_actor(
                     camera_bp, camera_transform, attach_to=self.vehicle
                 )
-                self.camera_sensor.listen(self.camera_widget.update_image)
+                self.camera_sensor.listen(self.camera_widget.submit_frame)
                 
                 self.add_log("success", "✅ CARLA vehicle spawned successfully")
             
@@ -646,25 +907,11 @@ class Enhanced3DSimulation(QMainWindow):
         action = command["action"]
         
         self.add_log("command", f"🎮 {action}: {command}")
+        self._boost_status_updates()
         
-        if action == "ai_command":
-            self.process_ai_command(command["text"])
-        elif action == "forward":
-            self.execute_movement("forward", command.get("speed", 40))
-        elif action == "reverse":
-            self.execute_movement("reverse", command.get("speed", 20))
-        elif action == "turn":
-            self.execute_turn(command["direction"])
-        elif action == "emergency_stop":
-            self.execute_emergency_stop()
-        elif action == "park":
-            self.execute_parking()
-        elif action == "set_speed":
-            self.set_vehicle_speed(command["speed"])
-        elif action == "set_steering":
-            self.set_vehicle_steering(command["angle"])
-        elif action == "set_weather":
-            self.set_weather(command["weather"])
+        handler = self._action_dispatch.get(action)
+        if handler:
+            handler(command)
     
     def process_ai_command(self, text):
         """Process AI command with Gemini"""
@@ -676,7 +923,11 @@ class Enhanced3DSimulation(QMainWindow):
             "traffic": {"vehicles_count": 3, "pedestrians_count": 2}
         }
         
-        response = self.gemini_agent.process_command(text, vehicle_status, environment_info)
+        self.ai_request.emit(text, vehicle_status, environment_info)
+    
+    def _on_ai_response(self, text, response):
+        """Handle a Gemini response delivered from the worker thread"""
+        self._boost_status_updates()
         self.add_log("ai", f"🧠 AI Response: {response['response']}")
         
         if not response.get('clarification_needed', False):
@@ -699,8 +950,8 @@ class Enhanced3DSimulation(QMainWindow):
         self.vehicle_heading = (self.vehicle_heading + turn_angle) % 360
         self.can_simulator.update_vehicle_state(steering_angle=turn_angle)
         
-        # Reset steering after delay
-        QTimer.singleShot(1000, lambda: self.can_simulator.update_vehicle_state(steering_angle=0))
+        # Reset steering after a delay; a newer turn pushes the deadline back
+        self._steering_reset_at = time.monotonic() + 1.0
     
     def execute_emergency_stop(self):
         """Execute emergency stop"""
@@ -752,12 +1003,8 @@ class Enhanced3DSimulation(QMainWindow):
             self.add_log("nav", f"🗺️ Navigating to: {destination}")
             self.execute_movement("forward", 35)
         elif action == "speed_change":
-            change_type = parameters.get('change_type', 'increase')
-            if change_type == 'increase':
-                new_speed = min(self.vehicle_speed + 20, 80)
-            else:
-                new_speed = max(self.vehicle_speed - 20, 0)
-            self.set_vehicle_speed(new_speed)
+            delta = 20 if parameters.get('change_type', 'increase') == 'increase' else -20
+            self.set_vehicle_speed(max(0, min(80, self.vehicle_speed + delta)))
         elif action == "turn":
             direction = parameters.get('direction', 'left')
             self.execute_turn(direction)
@@ -771,10 +1018,10 @@ class Enhanced3DSimulation(QMainWindow):
             speed_ms = speed / 3.6  # km/h to m/s
             pixel_speed = speed_ms * 5  # Scale for visualization
             
-            # Calculate new position
-            heading_rad = math.radians(self.vehicle_heading)
-            dx = pixel_speed * math.cos(heading_rad)
-            dy = pixel_speed * math.sin(heading_rad)
+            # Calculate new position (heading rounded to the nearest degree)
+            h = int(round(self.vehicle_heading)) % 360
+            dx = pixel_speed * self._COS[h]
+            dy = pixel_speed * self._SIN[h]
             
             # Update position with bounds checking
             new_x = self.vehicle_x + dx
@@ -787,6 +1034,14 @@ class Enhanced3DSimulation(QMainWindow):
     
     def update_simulation(self):
         """Update simulation state"""
+        now = time.monotonic()
+        self.can_simulator.tick(now - self._last_simulation_update)
+        self._last_simulation_update = now
+        
+        if self._steering_reset_at and now >= self._steering_reset_at:
+            self.can_simulator.update_vehicle_state(steering_angle=0)
+            self._steering_reset_at = 0.0
+        
         # Update vehicle position
         self.update_vehicle_position(self.vehicle_speed, 0)
         
@@ -795,54 +1050,86 @@ class Enhanced3DSimulation(QMainWindow):
             self.vehicle_x, self.vehicle_y, self.vehicle_heading, self.vehicle_speed
         )
         
-        # Update status display
-        status = self.can_simulator.get_vehicle_state()
-        self.status_labels["speed"].setText(f"Speed: {status.get('speed', 0):.1f} km/h")
-        self.status_labels["position"].setText(f"Position: ({self.vehicle_x:.0f}, {self.vehicle_y:.0f})")
-        self.status_labels["heading"].setText(f"Heading: {self.vehicle_heading:.0f}°")
-        self.status_labels["gear"].setText(f"Gear: {status.get('gear', 'P')}")
-        self.status_labels["fuel"].setText(f"Fuel: {status.get('fuel_level', 1.0)*100:.0f}%")
-        self.status_labels["engine"].setText(f"Engine: {'On' if status.get('speed', 0) > 0 else 'Off'}")
-        
         # Update CARLA vehicle if connected
         if self.vehicle and CARLA_AVAILABLE:
-            try:
-                control = carla.VehicleControl()
-                control.throttle = min(self.vehicle_speed / 100.0, 1.0)
-                control.brake = 0.0 if self.vehicle_speed > 0 else 1.0
-                control.steer = 0.0  # Simplified for demo
-                self.vehicle.apply_control(control)
-            except Exception as e:
-                pass  # Silent fail for demo
+            throttle = min(self.vehicle_speed / 100.0, 1.0)
+            brake = 0.0 if self.vehicle_speed > 0 else 1.0
+            steer = 0.0  # Simplified for demo
+            # apply_control is an RPC to the server; only send it when the control changes
+            if (throttle, brake, steer) != self._last_control:
+                try:
+                    control = carla.VehicleControl()
+                    control.throttle = throttle
+                    control.brake = brake
+                    control.steer = steer
+                    self._control_executor.submit(self.vehicle.apply_control, control)
+                    self._last_control = (throttle, brake, steer)
+                except Exception as e:
+                    pass  # Silent fail for demo
+    
+    def update_status_display(self):
+        """Refresh the status labels (runs on its own, slower timer)"""
+        now = time.monotonic()
+        if self._status_boost_until and now >= self._status_boost_until:
+            self._status_boost_until = 0.0
+            self._status_timer.setInterval(self.STATUS_IDLE_INTERVAL)
+        
+        status = self.can_simulator.get_vehicle_state()
+        # Only speed needs a decimal; whole-number fields use round() + str()
+        self._set_status_text("speed", f"Speed: {status.get('speed', 0):.1f} km/h")
+        self._set_status_text("position", "Position: (" + str(round(self.vehicle_x)) + ", " + str(round(self.vehicle_y)) + ")")
+        self._set_status_text("heading", "Heading: " + str(round(self.vehicle_heading)) + "°")
+        self._set_status_text("gear", "Gear: " + status.get('gear', 'P'))
+        self._set_status_text("fuel", "Fuel: " + str(round(status.get('fuel_level', 1.0) * 100)) + "%")
+        self._set_status_text("engine", f"Engine: {'On' if status.get('speed', 0) > 0 else 'Off'}")
+    
+    def _boost_status_updates(self):
+        """Refresh status labels at the fast rate for a short while"""
+        self._status_boost_until = time.monotonic() + self.STATUS_BOOST_DURATION
+        if self._status_timer.interval() != self.STATUS_ACTIVE_INTERVAL:
+            self._status_timer.setInterval(self.STATUS_ACTIVE_INTERVAL)
+    
+    def _set_status_text(self, key, text):
+        """Update a status label only when its text changes, avoiding a relayout"""
+        if self._status_texts.get(key) != text:
+            self._status_texts[key] = text
+            self.status_labels[key].setText(text)
     
     def add_log(self, log_type, message):
-        """Add entry to activity log"""
+        """Queue an entry for the activity log"""
         timestamp = time.strftime("%H:%M:%S")
-        color_map = {
-            "info": "blue",
-            "success": "green", 
-            "warning": "orange",
-            "error": "red",
-            "command": "purple",
-            "ai": "darkgreen",
-            "nav": "brown"
-        }
-        
-        color = color_map.get(log_type, "black")
-        self.activity_log.append(f'<span style="color: {color};">[{timestamp}] {message}</span>')
-        
-        # Auto-scroll
-        self.activity_log.verticalScrollBar().setValue(
-            self.activity_log.verticalScrollBar().maximum()
-        )
+        brush = self.LOG_BRUSHES.get(log_type, self.LOG_BRUSH_DEFAULT)
+        self._log_buffer.append((brush, f'[{timestamp}] {message}'))
+        if not self._log_timer.isActive():
+            self._log_timer.start(self.LOG_FLUSH_INTERVAL)
+    
+    def _flush_log(self):
+        """Append all queued log entries as list items, dropping the oldest past the ring size"""
+        log = self.activity_log
+        log.setUpdatesEnabled(False)
+        while self._log_buffer:
+            brush, text = self._log_buffer.popleft()
+            item = QListWidgetItem(text)
+            item.setForeground(brush)
+            log.addItem(item)
+        excess = log.count() - self.LOG_MAX_LINES
+        for _ in range(excess):
+            log.takeItem(0)  # the taken item is owned by Python and freed here
+        log.setUpdatesEnabled(True)
+        log.scrollToBottom()
     
     def closeEvent(self, event):
         """Clean up on close"""
+        # Drop queued controls and let an in-flight one finish before the actors go away
+        self._control_executor.shutdown(wait=True, cancel_futures=True)
         if self.camera_sensor:
             self.camera_sensor.destroy()
         if self.vehicle:
             self.vehicle.destroy()
         self.can_simulator.stop()
+        self._ai_thread.quit()
+        if not self._ai_thread.wait(self.AI_THREAD_STOP_TIMEOUT):
+            self.logger.warning("Gemini request still running at close; not waiting for it")
         event.accept()
 
 def main():
@@ -11,40 +11,48 @@ except ImportError:
 from config import Config
 from utils.logger import Logger
 from nlp.intent_classifier import CommandParser, Intent
+import copy
 import json
 import re
+import string
+from collections import OrderedDict, deque
 
-class GeminiAgent:
-    """Gemini AI agent for natural language processing of driving commands"""
-    
-    def __init__(self):
-        self.logger = Logger.get_logger(__name__)
-        self.command_parser = CommandParser()
-        self.model = None
-        self.conversation_history = []
-        
-        # Try to setup Gemini
-        if genai is not None:
-            self.setup_gemini()
-        else:
-            self.logger.warning("Gemini AI not available - using fallback mode")
-        
-    def setup_gemini(self):
-        """Initialize Gemini AI with API key and configuration"""
+# Decodes the first JSON object in a reply in one linear pass
+_JSON_DECODER = json.JSONDecoder()
+_json_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+# Faster context encoding and reply decoding (orjson when installed)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(data):
+    """Compact JSON text for a context dict"""
+    if orjson is not None:
         try:
-            if not Config.GOOGLE_API_KEY or Config.GOOGLE_API_KEY == "your_gemini_api_key_here":
-                raise ValueError("Google API key not configured")
-            
-            genai.configure(api_key=Config.GOOGLE_API_KEY)
-            self.model = genai.GenerativeModel('gemini-pro')
-            self.logger.info("Gemini AI initialized successfully")
-        except Exception as e:
-            self.logger.error(f"Failed to initialize Gemini AI: {e}")
-            self.model = None
-    
-    def get_system_prompt(self):
-        """Get the system prompt for the Gemini agent"""
-        return """You are an AI assistant for a simulated autonomous driving system called CARLA Voice Commander. 
+            return orjson.dumps(data).decode('utf-8')
+        except TypeError:
+            pass  # e.g. non-str keys or numpy scalars; the stdlib encoder copes
+    return _json_encode(data)
+
+
+def _loads_object(text, start, end):
+    """Decode the JSON object at text[start]; end is the index of the last '}'"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text[start:end + 1])
+        except orjson.JSONDecodeError:
+            pass  # trailing prose after the object; let the stdlib scanner find its end
+    return _JSON_DECODER.raw_decode(text, start)[0]
+
+# Fallback keyword matchers; "stop" words also match inflections like "stopping"
+_STOP_RE = re.compile(r'\b(?:stop|halt|brake)')
+_GO_RE = re.compile(r'\b(?:go|drive|navigate)\b')
+
+# Fixed instructions placed ahead of every command prompt
+_SYSTEM_PROMPT = """You are an AI assistant for a simulated autonomous driving system called CARLA Voice Commander. 
         Users will speak or type commands related to driving a car inside a simulated city (using CARLA Simulator). 
         
         Your capabilities:
@@ -79,6 +87,65 @@ class GeminiAgent:
         - Provide helpful and informative responses
         - Use a polite and professional tone
         """
+
+class GeminiAgent:
+    """Gemini AI agent for natural language processing of driving commands"""
+    
+    # Per-command prompt; only the context and user text change between calls
+    _PROMPT_TEMPLATE = string.Template("""
+        $system_prompt
+        
+        Current Context:
+        $context
+        
+        User Command: "$user_input"
+        
+        Please analyze this command and provide a JSON response with the appropriate action.
+        """)
+    
+    HISTORY_LIMIT = 256  # most recent exchanges kept in conversation_history
+    RESPONSE_CACHE_SIZE = 64  # recent (utterance, speed bucket) -> response entries
+    
+    # Intent -> (action, response text built from the parsed parameters)
+    _INTENT_RESPONSES = {
+        Intent.NAVIGATE: ("navigate", lambda p: f"I'll navigate to {p.get('destination', '')}"),
+        Intent.STOP: ("stop", lambda p: "Stopping the vehicle"),
+        Intent.TURN: ("turn", lambda p: f"Turning {p.get('direction', 'left')}"),
+        Intent.SPEED_CHANGE: ("speed_change", lambda p: f"I'll {p.get('change_type', 'increase')} the speed"),
+        Intent.PARK: ("park", lambda p: "I'll find a parking spot"),
+        Intent.FOLLOW: ("follow", lambda p: f"I'll follow that {p.get('target', 'vehicle')}"),
+    }
+    
+    def __init__(self):
+        self.logger = Logger.get_logger(__name__)
+        self.command_parser = CommandParser()
+        self.model = None
+        self.conversation_history = deque(maxlen=self.HISTORY_LIMIT)
+        self._context_cache = {}  # label -> (snapshot of the dict, its serialized JSON)
+        self._response_cache = OrderedDict()  # LRU of (response, method) per command key
+        
+        # Try to setup Gemini
+        if genai is not None:
+            self.setup_gemini()
+        else:
+            self.logger.warning("Gemini AI not available - using fallback mode")
+        
+    def setup_gemini(self):
+        """Initialize Gemini AI with API key and configuration"""
+        try:
+            if not Config.GOOGLE_API_KEY or Config.GOOGLE_API_KEY == "your_gemini_api_key_here":
+                raise ValueError("Google API key not configured")
+            
+            genai.configure(api_key=Config.GOOGLE_API_KEY)
+            self.model = genai.GenerativeModel('gemini-pro')
+            self.logger.info("Gemini AI initialized successfully")
+        except Exception as e:
+            self.logger.error(f"Failed to initialize Gemini AI: {e}")
+            self.model = None
+    
+    def get_system_prompt(self):
+        """Get the system prompt for the Gemini agent"""
+        return _SYSTEM_PROMPT
     
     def process_command(self, user_input, vehicle_status=None, environment_info=None):
         """
@@ -93,111 +160,137 @@ class GeminiAgent:
             dict: Structured response with action and parameters
         """
         try:
+            # Repeated utterances in the same speed regime reuse the earlier answer
+            key = self._cache_key(user_input, vehicle_status)
+            cached = self._cached_response(key, user_input)
+            if cached is not None:
+                return cached
+            
             # First, try local NLP parsing
             nlp_result = self.command_parser.parse_command(user_input)
+            response = self._process_locally(user_input, nlp_result)
             
-            if nlp_result["intent"] != Intent.UNKNOWN and nlp_result["confidence"] > 0.7:
-                # Use NLP result if confident
-                response = self._nlp_to_response(nlp_result)
-                self.logger.info(f"Used NLP parsing: {user_input} -> {response['action']}")
-            elif self.model is not None:
+            if response is None:
                 # Fall back to Gemini AI
                 response = self._process_with_gemini(user_input, vehicle_status, environment_info)
                 self.logger.info(f"Used Gemini AI: {user_input} -> {response['action']}")
-            else:
-                # Fallback to basic parsing
-                response = self._fallback_parsing(user_input, nlp_result)
-                self.logger.info(f"Used fallback parsing: {user_input} -> {response['action']}")
             
-            # Add to conversation history
-            self.conversation_history.append({
-                "user_input": user_input,
-                "ai_response": response,
-                "method": "nlp" if nlp_result["confidence"] > 0.7 else "gemini" if self.model else "fallback"
-            })
+            self._remember(key, user_input, response, nlp_result)
+            return response
             
+        except Exception as e:
+            self.logger.error(f"Error processing command: {e}")
+            return self._get_error_response()
+    
+    async def process_command_async(self, user_input, vehicle_status=None, environment_info=None):
+        """
+        Coroutine version of process_command for asyncio hosts
+        
+        Local parsing runs inline; only the Gemini request is awaited, so the
+        event loop keeps running while the model responds.
+        """
+        try:
+            key = self._cache_key(user_input, vehicle_status)
+            cached = self._cached_response(key, user_input)
+            if cached is not None:
+                return cached
+            
+            nlp_result = self.command_parser.parse_command(user_input)
+            response = self._process_locally(user_input, nlp_result)
+            
+            if response is None:
+                response = await self._process_with_gemini_async(user_input, vehicle_status, environment_info)
+                self.logger.info(f"Used Gemini AI: {user_input} -> {response['action']}")
+            
+            self._remember(key, user_input, response, nlp_result)
             return response
             
         except Exception as e:
             self.logger.error(f"Error processing command: {e}")
             return self._get_error_response()
     
+    def _process_locally(self, user_input, nlp_result):
+        """Answer without Gemini, or return None when the command should go to the model"""
+        if nlp_result["intent"] != Intent.UNKNOWN and nlp_result["confidence"] > 0.7:
+            # Use NLP result if confident
+            response = self._nlp_to_response(nlp_result)
+            self.logger.info(f"Used NLP parsing: {user_input} -> {response['action']}")
+            return response
+        
+        if self.model is not None:
+            return None
+        
+        # Fallback to basic parsing
+        response = self._fallback_parsing(user_input, nlp_result)
+        self.logger.info(f"Used fallback parsing: {user_input} -> {response['action']}")
+        return response
+    
+    @staticmethod
+    def _cache_key(user_input, vehicle_status):
+        """Normalized utterance plus a 10 km/h speed bucket"""
+        speed_bucket = round(vehicle_status.get("speed", 0) / 10) if vehicle_status else None
+        return user_input.lower().strip(), speed_bucket
+    
+    def _cached_response(self, key, user_input):
+        """Return a copy of a cached response (recording it in the history), or None"""
+        cached = self._response_cache.get(key)
+        if cached is None:
+            return None
+        self._response_cache.move_to_end(key)
+        cached_response, method = cached
+        response = copy.deepcopy(cached_response)  # parameters is nested and callers may mutate it
+        self.logger.info(f"Used cached response: {user_input} -> {response['action']}")
+        self._add_to_history(user_input, response, method)
+        return response
+    
+    def _remember(self, key, user_input, response, nlp_result):
+        """Record a fresh exchange in the history and the response cache"""
+        method = "nlp" if nlp_result["confidence"] > 0.7 else "gemini" if self.model else "fallback"
+        self._add_to_history(user_input, response, method)
+        # Clarify and error replies are not cached, so the next attempt asks again
+        if response.get("clarification_needed") or response.get("action") == "clarify":
+            return
+        self._response_cache[key] = (copy.deepcopy(response), method)
+        if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def _add_to_history(self, user_input, response, method):
+        """Add an exchange to the conversation history"""
+        self.conversation_history.append({
+            "user_input": user_input,
+            "ai_response": response,
+            "method": method
+        })
+    
     def _nlp_to_response(self, nlp_result):
         """Convert NLP parsing result to standard response format"""
-        intent = nlp_result["intent"]
-        params = nlp_result["parameters"]
-        
-        if intent == Intent.NAVIGATE:
-            destination = params.get("destination", "")
-            return {
-                "action": "navigate",
-                "destination": destination,
-                "parameters": params,
-                "response": f"I'll navigate to {destination}",
-                "clarification_needed": False
-            }
-        elif intent == Intent.STOP:
-            return {
-                "action": "stop",
-                "destination": "",
-                "parameters": params,
-                "response": "Stopping the vehicle",
-                "clarification_needed": False
-            }
-        elif intent == Intent.TURN:
-            direction = params.get("direction", "left")
-            return {
-                "action": "turn",
-                "destination": "",
-                "parameters": params,
-                "response": f"Turning {direction}",
-                "clarification_needed": False
-            }
-        elif intent == Intent.SPEED_CHANGE:
-            change_type = params.get("change_type", "increase")
-            return {
-                "action": "speed_change",
-                "destination": "",
-                "parameters": params,
-                "response": f"I'll {change_type} the speed",
-                "clarification_needed": False
-            }
-        elif intent == Intent.PARK:
-            return {
-                "action": "park",
-                "destination": "",
-                "parameters": params,
-                "response": "I'll find a parking spot",
-                "clarification_needed": False
-            }
-        elif intent == Intent.FOLLOW:
-            target = params.get("target", "vehicle")
-            return {
-                "action": "follow",
-                "destination": "",
-                "parameters": params,
-                "response": f"I'll follow that {target}",
-                "clarification_needed": False
-            }
-        else:
+        handler = self._INTENT_RESPONSES.get(nlp_result["intent"])
+        if handler is None:
             return self._get_error_response()
+        
+        action, describe = handler
+        params = nlp_result["parameters"]
+        return {
+            "action": action,
+            "destination": params.get("destination", "") if action == "navigate" else "",
+            "parameters": params,
+            "response": describe(params),
+            "clarification_needed": False
+        }
     
-    def _process_with_gemini(self, user_input, vehicle_status, environment_info):
-        """Process command using Gemini AI"""
+    def _build_prompt(self, user_input, vehicle_status, environment_info):
+        """Build the full Gemini prompt for a command"""
         # Build context for the AI
         context = self._build_context(vehicle_status, environment_info)
         
         # Create the full prompt
-        prompt = f"""
-        {self.get_system_prompt()}
-        
-        Current Context:
-        {context}
-        
-        User Command: "{user_input}"
-        
-        Please analyze this command and provide a JSON response with the appropriate action.
-        """
+        return self._PROMPT_TEMPLATE.substitute(
+            system_prompt=_SYSTEM_PROMPT, context=context, user_input=user_input
+        )
+    
+    def _process_with_gemini(self, user_input, vehicle_status, environment_info):
+        """Process command using Gemini AI"""
+        prompt = self._build_prompt(user_input, vehicle_status, environment_info)
         
         # Generate response from Gemini
         response = self.model.generate_content(prompt)
@@ -205,6 +298,12 @@ class GeminiAgent:
         # Parse the JSON response
         return self._parse_response(response.text)
     
+    async def _process_with_gemini_async(self, user_input, vehicle_status, environment_info):
+        """Process command using Gemini AI without blocking the event loop"""
+        prompt = self._build_prompt(user_input, vehicle_status, environment_info)
+        response = await self.model.generate_content_async(prompt)
+        return self._parse_response(response.text)
+    
     def _fallback_parsing(self, user_input, nlp_result):
         """Fallback parsing when Gemini is not available"""
         # Use NLP result even if confidence is low
@@ -216,7 +315,7 @@ class GeminiAgent:
         # Very basic keyword matching
         user_lower = user_input.lower()
         
-        if any(word in user_lower for word in ["stop", "halt", "brake"]):
+        if _STOP_RE.search(user_lower):
             return {
                 "action": "stop",
                 "destination": "",
@@ -224,7 +323,7 @@ class GeminiAgent:
                 "response": "Stopping the vehicle",
                 "clarification_needed": False
             }
-        elif any(word in user_lower for word in ["go", "drive", "navigate"]):
+        elif _GO_RE.search(user_lower):
             return {
                 "action": "navigate",
                 "destination": "destination",
@@ -239,21 +338,30 @@ class GeminiAgent:
         context_parts = []
         
         if vehicle_status:
-            context_parts.append(f"Vehicle Status: {json.dumps(vehicle_status, indent=2)}")
+            context_parts.append(f"Vehicle Status: {self._serialize_context('vehicle', vehicle_status)}")
         
         if environment_info:
-            context_parts.append(f"Environment: {json.dumps(environment_info, indent=2)}")
+            context_parts.append(f"Environment: {self._serialize_context('environment', environment_info)}")
         
         return "\n".join(context_parts) if context_parts else "No additional context available"
     
+    def _serialize_context(self, label, data):
+        """Compact JSON for a context dict, reused while the dict's contents are unchanged"""
+        cached = self._context_cache.get(label)
+        if cached is not None and cached[0] == data:
+            return cached[1]
+        text = _dumps(data)
+        self._context_cache[label] = (copy.deepcopy(data), text)
+        return text
+    
     def _parse_response(self, response_text):
         """Parse and validate the Gemini response"""
         try:
             # Extract JSON from response (handle cases where AI adds extra text)
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                parsed = json.loads(json_str)
+            start = response_text.find('{')
+            end = response_text.rfind('}')
+            if start != -1 and end > start:
+                parsed = _loads_object(response_text, start, end)
             else:
                 # Fallback if no JSON found
                 parsed = {
@@ -290,12 +398,13 @@ class GeminiAgent:
         }
     
     def get_conversation_history(self):
-        """Get the conversation history"""
-        return self.conversation_history
+        """Get the conversation history, oldest first"""
+        return list(self.conversation_history)
     
     def clear_history(self):
         """Clear the conversation history"""
-        self.conversation_history = []
+        self.conversation_history.clear()
+        self._response_cache.clear()
         self.logger.info("Conversation history cleared")
 
 # Example usage and testing
@@ -0,0 +1,20 @@
+"""
+Qt worker that runs Gemini AI requests off the GUI thread
+"""
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+class GeminiWorker(QObject):
+    """Runs GeminiAgent commands on a worker thread so network calls don't block the GUI"""
+
+    response_ready = pyqtSignal(str, dict)
+
+    def __init__(self, agent):
+        super().__init__()
+        self.agent = agent
+
+    @pyqtSlot(str, dict, dict)
+    def process(self, text, vehicle_status, environment_info):
+        """Slot: queued from the GUI thread, handled in arrival order"""
+        response = self.agent.process_command(text, vehicle_status, environment_info)
+        self.response_ready.emit(text, response)
@@ -5,6 +5,26 @@ Final summary of improvements made to Webots Voice Commander
 
 import os
 
+# Directories never worth listing in the project tree
+SKIP_DIRS = {'__pycache__', 'venv', 'node_modules', 'build', 'dist'}
+
+def print_tree(path=".", level=0):
+    """Print a directory tree using os.scandir, reusing each entry's cached type"""
+    print(f"{' ' * 2 * level}{os.path.basename(path)}/")
+    subindent = " " * 2 * (level + 1)
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRS:
+                    subdirs.append(entry.path)
+            elif not entry.name.endswith('.pyc'):
+                print(f"{subindent}{entry.name}")
+    for subdir in subdirs:
+        print_tree(subdir, level + 1)
+
 def main():
     print("🎉 WEBOTS VOICE COMMANDER - IMPROVEMENTS SUMMARY")
     print("=" * 60)
@@ -31,16 +51,7 @@ def main():
     print("  ✅ Support for both 'command' and 'action' formats")
     
     print("\n📁 CURRENT PROJECT STRUCTURE:")
-    for root, dirs, files in os.walk("."):
-        # Skip hidden directories and __pycache__
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
-        level = root.replace(".", "").count(os.sep)
-        indent = " " * 2 * level
-        print(f"{indent}{os.path.basename(root)}/")
-        subindent = " " * 2 * (level + 1)
-        for file in files:
-            if not file.startswith('.') and not file.endswith('.pyc'):
-                print(f"{subindent}{file}")
+    print_tree(".")
     
     print("\n🚀 READY TO USE:")
     print("  1. Run: python test_overlay.py")
@@ -9,17 +9,39 @@ import sys
 import time
 import os
 
-def check_carla_server():
+def check_carla_server(timeout=2):
     """Check if CARLA server is running on localhost:2000"""
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(2)
+        sock.settimeout(timeout)
         result = sock.connect_ex(('localhost', 2000))
         sock.close()
         return result == 0
     except Exception:
         return False
 
+def wait_for_carla_server(timeout=30):
+    """Poll until CARLA accepts connections, backing off from 50 ms to 500 ms"""
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = 0.05
+    reported = 0
+    
+    while True:
+        if check_carla_server(timeout=0.5):
+            return True
+        now = time.monotonic()
+        if now >= deadline:
+            return False
+        
+        waited = int(now - started)
+        if waited > reported:
+            print(f"⏳ Waiting... ({waited}/{timeout}s)")
+            reported = waited
+        
+        time.sleep(min(delay, deadline - now))
+        delay = min(delay * 1.5, 0.5)
+
 def start_carla():
     """Start CARLA server"""
     carla_path = r"C:\Carla-0.10.0-Win64-Shipping\CarlaUnreal.exe"
@@ -45,12 +67,8 @@ def main():
         if start_carla():
             print("🔄 Waiting for CARLA to start...")
             # Wait up to 30 seconds for CARLA to start
-            for i in range(30):
-                time.sleep(1)
-                if check_carla_server():
-                    print("✅ CARLA server is now running!")
-                    break
-                print(f"⏳ Waiting... ({i+1}/30)")
+            if wait_for_carla_server(30):
+                print("✅ CARLA server is now running!")
             else:
                 print("❌ CARLA server did not start in time")
                 print("💡 Try starting CARLA manually:")
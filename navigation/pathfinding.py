@@ -3,47 +3,229 @@ A* pathfinding algorithm for navigation
 """
 
 import heapq
+import itertools
 import math
 import numpy as np
+from collections import OrderedDict
 from utils.logger import Logger
 
-class Node:
-    """Node for A* pathfinding"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+SQRT2 = math.sqrt(2)
+SQRT2_M2 = SQRT2 - 2
+
+# 8-directional moves as (dx, dy, step cost)
+_NEIGHBOR_OFFSETS = tuple((dx, dy, 1.0 if dx == 0 or dy == 0 else SQRT2)
+                          for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy)
+_OFFSET_DX = np.array([dx for dx, _, _ in _NEIGHBOR_OFFSETS], dtype=np.int64)
+_OFFSET_DY = np.array([dy for _, dy, _ in _NEIGHBOR_OFFSETS], dtype=np.int64)
+_OFFSET_COST = np.array([cost for _, _, cost in _NEIGHBOR_OFFSETS])
+
+def _make_astar_grid(fixed_width=-1, fixed_height=-1):
+    """
+    Build the dense-grid A* kernel
     
-    def __init__(self, position, g_cost=0, h_cost=0, parent=None):
-        self.position = position  # (x, y)
-        self.g_cost = g_cost  # Cost from start
-        self.h_cost = h_cost  # Heuristic cost to goal
-        self.f_cost = g_cost + h_cost  # Total cost
-        self.parent = parent
+    With a fixed size the dimensions are closure constants, which Numba folds
+    into the compiled code; the default kernel reads them from the map.
+    """
+    def astar_grid(obstacles, sx, sy, gx, gy):
+        """
+        A* over a dense (width, height) obstacle map
+        
+        Cells are indexed x * height + y. Returns the path as an (n, 2) array of
+        grid cells from start to goal, or an empty array if the goal is unreachable.
+        """
+        width = fixed_width
+        height = fixed_height
+        if width < 0:
+            width, height = obstacles.shape
+        size = width * height
+        g_score = np.full(size, np.inf)
+        came_from = np.full(size, -1, dtype=np.int64)
+        closed = np.zeros(size, dtype=np.bool_)
+        
+        # Binary min-heap of (f_cost, cell) with lazy deletion, grown on demand
+        heap_f = np.empty(1024)
+        heap_i = np.empty(1024, dtype=np.int64)
+        start = sx * height + sy
+        goal = gx * height + gy
+        dx0 = abs(sx - gx)
+        dy0 = abs(sy - gy)
+        g_score[start] = 0.0
+        heap_f[0] = dx0 + dy0 + SQRT2_M2 * min(dx0, dy0)
+        heap_i[0] = start
+        count = 1
+        found = False
+        
+        while count > 0:
+            current = heap_i[0]
+            count -= 1
+            last_f = heap_f[count]
+            last_i = heap_i[count]
+            pos = 0
+            while True:
+                child = 2 * pos + 1
+                if child >= count:
+                    break
+                if child + 1 < count and heap_f[child + 1] < heap_f[child]:
+                    child += 1
+                if heap_f[child] >= last_f:
+                    break
+                heap_f[pos] = heap_f[child]
+                heap_i[pos] = heap_i[child]
+                pos = child
+            heap_f[pos] = last_f
+            heap_i[pos] = last_i
+            
+            if closed[current]:
+                continue
+            if current == goal:
+                found = True
+                break
+            closed[current] = True
+            cx = current // height
+            cy = current % height
+            current_g = g_score[current]
+            
+            for k in range(_OFFSET_DX.shape[0]):
+                nx = cx + _OFFSET_DX[k]
+                ny = cy + _OFFSET_DY[k]
+                if nx < 0 or ny < 0 or nx >= width or ny >= height or obstacles[nx, ny]:
+                    continue
+                neighbor = nx * height + ny
+                if closed[neighbor]:
+                    continue
+                g_cost = current_g + _OFFSET_COST[k]
+                if g_cost < g_score[neighbor]:
+                    g_score[neighbor] = g_cost
+                    came_from[neighbor] = current
+                    hx = abs(nx - gx)
+                    hy = abs(ny - gy)
+                    f_cost = g_cost + hx + hy + SQRT2_M2 * min(hx, hy)
+                    
+                    if count == heap_f.shape[0]:
+                        grown_f = np.empty(2 * count)
+                        grown_i = np.empty(2 * count, dtype=np.int64)
+                        grown_f[:count] = heap_f
+                        grown_i[:count] = heap_i
+                        heap_f = grown_f
+                        heap_i = grown_i
+                    pos = count
+                    count += 1
+                    while pos > 0:
+                        parent = (pos - 1) // 2
+                        if heap_f[parent] <= f_cost:
+                            break
+                        heap_f[pos] = heap_f[parent]
+                        heap_i[pos] = heap_i[parent]
+                        pos = parent
+                    heap_f[pos] = f_cost
+                    heap_i[pos] = neighbor
+        
+        if not found:
+            return np.empty((0, 2), dtype=np.int64)
+        
+        length = 1
+        cell = goal
+        while cell != start:
+            cell = came_from[cell]
+            length += 1
+        path = np.empty((length, 2), dtype=np.int64)
+        cell = goal
+        for i in range(length - 1, -1, -1):
+            path[i, 0] = cell // height
+            path[i, 1] = cell % height
+            cell = came_from[cell]
+        return path
     
-    def __lt__(self, other):
-        return self.f_cost < other.f_cost
+    return astar_grid
+
+_astar_grid = _make_astar_grid()
+if NUMBA_AVAILABLE:
+    _astar_grid = njit(_astar_grid)
+
+class _GoalCache:
+    """Result of a backward search, reusable for any start cell it closed"""
     
-    def __eq__(self, other):
-        return self.position == other.position
+    def __init__(self, goal, came_from, closed, obstacle_version):
+        self.goal = goal
+        self.came_from = came_from  # cell -> next cell toward the goal
+        self.closed = closed
+        self.obstacle_version = obstacle_version
 
 class AStarPathfinder:
     """A* pathfinding implementation for CARLA navigation"""
     
+    # Searches whose bounding grid has at least this many cells use the
+    # compiled dense-grid kernel when Numba is installed; above the maximum
+    # (about 18 bytes per cell in the kernel) the dict search is used instead
+    NUMBA_MIN_CELLS = 10000
+    NUMBA_MAX_CELLS = 4000000
+    PATH_CACHE_SIZE = 128
+    
     def __init__(self, grid_size=2.0):
         self.logger = Logger.get_logger(__name__)
         self.grid_size = grid_size  # Size of each grid cell in meters
         self.obstacles = set()  # Set of obstacle positions
+        self._h_cache = {}  # Heuristic per grid position for the current search target
+        self._h_target = None
+        self._goal_cache = None  # Closed set of the last backward search
+        self._obstacle_cells = None  # (obstacle array, extent) for the dense-grid kernel
+        self._obstacle_grid = None  # (bounds, dense bool map) for the dense-grid kernel
+        self._obstacle_version = 0  # Bumped whenever the obstacle set changes
+        self._path_cache = OrderedDict()  # LRU of world paths per (start, goal, version)
+        self._specialized_astar = {}  # (width, height) -> kernel compiled for that size
+        self._map_frame = None  # (min_x, min_y, max_x, max_y) of the specialized map
         
     def add_obstacle(self, position):
         """Add obstacle at position"""
         grid_pos = self._world_to_grid(position)
         self.obstacles.add(grid_pos)
+        self._obstacles_changed()
     
     def add_obstacles(self, obstacle_list):
         """Add multiple obstacles"""
-        for obstacle in obstacle_list:
-            self.add_obstacle(obstacle)
+        positions = np.asarray(obstacle_list, dtype=np.float64)
+        if positions.size == 0:
+            return
+        # Truncate toward zero like _world_to_grid, for the whole batch at once
+        cells = (positions[:, :2] / self.grid_size).astype(np.int64)
+        self.obstacles.update(map(tuple, cells.tolist()))
+        self._obstacles_changed()
     
     def clear_obstacles(self):
         """Clear all obstacles"""
         self.obstacles.clear()
+        self._obstacles_changed()
+    
+    def _obstacles_changed(self):
+        """Invalidate everything derived from the obstacle set"""
+        self._obstacle_version += 1
+        self._obstacle_cells = None
+        self._obstacle_grid = None
+        self._path_cache.clear()
+    
+    def specialize(self, width, height, origin=(0, 0)):
+        """
+        Compile an A* kernel with a fixed map size, e.g. once a CARLA town is loaded
+        
+        Searches that fit inside the map then run on the specialized kernel.
+        
+        Args:
+            width (int): Map width in grid cells
+            height (int): Map height in grid cells
+            origin (tuple): Grid cell of the map's minimum corner
+        """
+        key = (width, height)
+        if key not in self._specialized_astar:
+            kernel = _make_astar_grid(width, height)
+            self._specialized_astar[key] = njit(kernel) if NUMBA_AVAILABLE else kernel
+        self._map_frame = (origin[0], origin[1], origin[0] + width - 1, origin[1] + height - 1)
+        self._obstacle_grid = None
     
     def find_path(self, start_pos, goal_pos):
         """
@@ -60,53 +242,180 @@ class AStarPathfinder:
             start_grid = self._world_to_grid(start_pos)
             goal_grid = self._world_to_grid(goal_pos)
             
-            # Initialize start node
-            start_node = Node(start_grid, 0, self._heuristic(start_grid, goal_grid))
-            
-            # Open and closed sets
-            open_set = [start_node]
-            closed_set = set()
-            
-            while open_set:
-                # Get node with lowest f_cost
-                current_node = heapq.heappop(open_set)
-                
-                # Check if goal reached
-                if current_node.position == goal_grid:
-                    path = self._reconstruct_path(current_node)
-                    return self._grid_to_world_path(path)
-                
-                closed_set.add(current_node.position)
-                
-                # Check neighbors
-                for neighbor_pos in self._get_neighbors(current_node.position):
-                    # Skip if obstacle or already processed
-                    if neighbor_pos in self.obstacles or neighbor_pos in closed_set:
-                        continue
-                    
-                    # Calculate costs
-                    g_cost = current_node.g_cost + self._distance(current_node.position, neighbor_pos)
-                    h_cost = self._heuristic(neighbor_pos, goal_grid)
-                    
-                    # Create neighbor node
-                    neighbor_node = Node(neighbor_pos, g_cost, h_cost, current_node)
-                    
-                    # Check if this path is better
-                    existing_node = self._find_node_in_open_set(open_set, neighbor_pos)
-                    if existing_node is None:
-                        heapq.heappush(open_set, neighbor_node)
-                    elif g_cost < existing_node.g_cost:
-                        existing_node.g_cost = g_cost
-                        existing_node.f_cost = g_cost + h_cost
-                        existing_node.parent = current_node
+            # Reuse the last result for the same cells while obstacles are unchanged
+            key = (start_grid, goal_grid, self._obstacle_version)
+            cached = self._path_cache.get(key)
+            if cached is not None:
+                self._path_cache.move_to_end(key)
+                return [dict(waypoint) for waypoint in cached]
             
-            self.logger.warning("No path found")
-            return []
+            # The cache keeps its own waypoint dicts so callers may edit theirs
+            path = self._search(start_grid, goal_grid)
+            self._path_cache[key] = [dict(waypoint) for waypoint in path]
+            if len(self._path_cache) > self.PATH_CACHE_SIZE:
+                self._path_cache.popitem(last=False)
+            return path
             
         except Exception as e:
             self.logger.error(f"Error in pathfinding: {e}")
             return []
     
+    def _search(self, start_grid, goal_grid):
+        """Run A* between grid cells and return the world path ([] if unreachable)"""
+        # A clear straight line is already a shortest route on the 8-connected grid
+        if self._line_of_sight(start_grid, goal_grid):
+            return self._grid_to_world_path(self._bresenham_line(start_grid, goal_grid))
+        
+        if NUMBA_AVAILABLE:
+            bounds = self._dense_bounds(start_grid, goal_grid)
+            shape = (bounds[2] - bounds[0] + 1, bounds[3] - bounds[1] + 1)
+            if (shape in self._specialized_astar
+                    or self.NUMBA_MIN_CELLS <= shape[0] * shape[1] <= self.NUMBA_MAX_CELLS):
+                obstacle_map = self._dense_obstacle_grid(bounds)
+                return self._find_path_dense(start_grid, goal_grid, bounds[:2], obstacle_map)
+        
+        # Search backwards from the goal: every cell it closes then knows its
+        # shortest route to the goal, which later starts can reuse
+        goal_cache = self._goal_cache
+        if (goal_cache is not None and goal_cache.goal == goal_grid
+                and goal_cache.obstacle_version == self._obstacle_version
+                and start_grid in goal_cache.closed):
+            return self._grid_to_world_path(self._reconstruct_path(goal_cache.came_from, start_grid))
+        
+        # Heuristic values only depend on the search target, so keep them across searches
+        if start_grid != self._h_target:
+            self._h_cache.clear()
+            self._h_target = start_grid
+        h_cache = self._h_cache
+        
+        # Heap entries are (f_cost, tie-breaker, position); a position may be
+        # pushed again with a lower cost, and stale entries are skipped on pop
+        counter = itertools.count()
+        open_heap = [(self._heuristic(goal_grid, start_grid), next(counter), goal_grid)]
+        g_score = {goal_grid: 0}
+        came_from = {}
+        closed_set = set()
+        obstacles = self.obstacles  # hash lookups on the set beat indexing a NumPy grid here
+        
+        while open_heap:
+            # Get position with lowest f_cost
+            _, _, current = heapq.heappop(open_heap)
+            if current in closed_set:
+                continue
+            
+            closed_set.add(current)
+            
+            # Check if start reached
+            if current == start_grid:
+                self._goal_cache = _GoalCache(goal_grid, came_from, closed_set, self._obstacle_version)
+                return self._grid_to_world_path(self._reconstruct_path(came_from, current))
+            
+            current_g = g_score[current]
+            cx, cy = current
+            
+            # Check neighbors
+            for dx, dy, step_cost in _NEIGHBOR_OFFSETS:
+                neighbor_pos = (cx + dx, cy + dy)
+                # Skip if obstacle or already processed; the start cell stays
+                # enterable like it was for a forward search leaving it
+                if neighbor_pos in closed_set or (neighbor_pos in obstacles
+                                                  and neighbor_pos != start_grid):
+                    continue
+                
+                # Keep only the cheapest known route to each position
+                g_cost = current_g + step_cost
+                if g_cost < g_score.get(neighbor_pos, math.inf):
+                    g_score[neighbor_pos] = g_cost
+                    came_from[neighbor_pos] = current
+                    h_cost = h_cache.get(neighbor_pos)
+                    if h_cost is None:
+                        h_cost = h_cache[neighbor_pos] = self._heuristic(neighbor_pos, start_grid)
+                    f_cost = g_cost + h_cost
+                    heapq.heappush(open_heap, (f_cost, next(counter), neighbor_pos))
+        
+        self.logger.warning("No path found")
+        return []
+    
+    def _bresenham_line(self, start_grid, goal_grid):
+        """Yield the grid cells on the straight line from start to goal (Bresenham)"""
+        x, y = start_grid
+        gx, gy = goal_grid
+        dx = abs(gx - x)
+        dy = -abs(gy - y)
+        sx = 1 if x < gx else -1
+        sy = 1 if y < gy else -1
+        err = dx + dy
+        
+        while True:
+            yield (x, y)
+            if x == gx and y == gy:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x += sx
+            if e2 <= dx:
+                err += dx
+                y += sy
+    
+    def _line_of_sight(self, start_grid, goal_grid):
+        """Check that no obstacle lies on the straight line between two cells"""
+        obstacles = self.obstacles
+        for cell in self._bresenham_line(start_grid, goal_grid):
+            if cell in obstacles:
+                return False
+        return True
+    
+    def _dense_bounds(self, start_grid, goal_grid):
+        """
+        Grid bounds covering the obstacles, start and goal plus a one-cell free
+        border (enough for any shortest path to go around)
+        
+        Returns:
+            tuple: (min_x, min_y, max_x, max_y), the specialized map if the search fits in it
+        """
+        if self._obstacle_cells is None:
+            cells = np.array(list(self.obstacles), dtype=np.int64).reshape(-1, 2)
+            extent = (cells.min(axis=0).tolist() + cells.max(axis=0).tolist()) if len(cells) else None
+            self._obstacle_cells = (cells, extent)
+        extent = self._obstacle_cells[1]
+        
+        xs = [start_grid[0], goal_grid[0]]
+        ys = [start_grid[1], goal_grid[1]]
+        if extent is not None:
+            xs += [extent[0], extent[2]]
+            ys += [extent[1], extent[3]]
+        bounds = (min(xs) - 1, min(ys) - 1, max(xs) + 1, max(ys) + 1)
+        
+        # Use the whole specialized map when the search fits inside it
+        frame = self._map_frame
+        if (frame is not None and frame[0] <= bounds[0] and frame[1] <= bounds[1]
+                and bounds[2] <= frame[2] and bounds[3] <= frame[3]):
+            bounds = frame
+        return bounds
+    
+    def _dense_obstacle_grid(self, bounds):
+        """Dense bool obstacle map over bounds, indexed [x - min_x, y - min_y]"""
+        cells = self._obstacle_cells[0]
+        if self._obstacle_grid is None or self._obstacle_grid[0] != bounds:
+            ox, oy, mx, my = bounds
+            obstacle_map = np.zeros((mx - ox + 1, my - oy + 1), dtype=np.bool_)
+            obstacle_map[cells[:, 0] - ox, cells[:, 1] - oy] = True
+            self._obstacle_grid = (bounds, obstacle_map)
+        
+        return self._obstacle_grid[1]
+    
+    def _find_path_dense(self, start_grid, goal_grid, origin, obstacle_map):
+        """Run the dense-grid kernel and convert its cells to a world path"""
+        ox, oy = origin
+        kernel = self._specialized_astar.get(obstacle_map.shape, _astar_grid)
+        cells = kernel(obstacle_map, start_grid[0] - ox, start_grid[1] - oy,
+                       goal_grid[0] - ox, goal_grid[1] - oy)
+        if len(cells) == 0:
+            self.logger.warning("No path found")
+            return []
+        return self._grid_to_world_path((x + ox, y + oy) for x, y in cells.tolist())
+    
     def _world_to_grid(self, world_pos):
         """Convert world coordinates to grid coordinates"""
         return (int(world_pos[0] / self.grid_size), int(world_pos[1] / self.grid_size))
@@ -116,75 +425,41 @@ class AStarPathfinder:
         return (grid_pos[0] * self.grid_size, grid_pos[1] * self.grid_size)
     
     def _grid_to_world_path(self, grid_path):
-        """Convert grid path to world path"""
+        """Convert grid path (any iterable of cells) to world path"""
         return [{"x": pos[0] * self.grid_size, "y": pos[1] * self.grid_size} 
                 for pos in grid_path]
     
     def _get_neighbors(self, position):
         """Get neighboring grid positions"""
         x, y = position
-        neighbors = []
-        
-        # 8-directional movement
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                neighbors.append((x + dx, y + dy))
-        
-        return neighbors
-    
-    def _distance(self, pos1, pos2):
-        """Calculate Euclidean distance between positions"""
-        return math.sqrt((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)
+        return [(x + dx, y + dy) for dx, dy, _ in _NEIGHBOR_OFFSETS]
     
     def _heuristic(self, pos1, pos2):
-        """Heuristic function (Euclidean distance)"""
-        return self._distance(pos1, pos2)
+        """Heuristic function (octile distance, exact on an open 8-connected grid)"""
+        dx = abs(pos1[0] - pos2[0])
+        dy = abs(pos1[1] - pos2[1])
+        return (dx + dy) + SQRT2_M2 * min(dx, dy)
     
-    def _reconstruct_path(self, node):
-        """Reconstruct path from goal node to start"""
-        path = []
-        current = node
+    def _reconstruct_path(self, came_from, start):
+        """Yield the path cells in order by following each cell's step toward the goal"""
+        current = start
         
-        while current:
-            path.append(current.position)
-            current = current.parent
-        
-        return path[::-1]  # Reverse to get start-to-goal path
-    
-    def _find_node_in_open_set(self, open_set, position):
-        """Find node with given position in open set"""
-        for node in open_set:
-            if node.position == position:
-                return node
-        return None
+        while current is not None:
+            yield current
+            current = came_from.get(current)
     
     def smooth_path(self, path, iterations=3):
         """Smooth path using simple averaging"""
         if len(path) < 3:
             return path
         
-        smoothed = path.copy()
+        points = np.array([(p['x'], p['y']) for p in path], dtype=np.float64)
         
         for _ in range(iterations):
-            new_path = [smoothed[0]]  # Keep start point
-            
-            for i in range(1, len(smoothed) - 1):
-                # Average with neighbors
-                prev_point = smoothed[i - 1]
-                curr_point = smoothed[i]
-                next_point = smoothed[i + 1]
-                
-                smoothed_x = (prev_point['x'] + curr_point['x'] + next_point['x']) / 3
-                smoothed_y = (prev_point['y'] + curr_point['y'] + next_point['y']) / 3
-                
-                new_path.append({"x": smoothed_x, "y": smoothed_y})
-            
-            new_path.append(smoothed[-1])  # Keep end point
-            smoothed = new_path
+            # Average each interior point with its neighbors; endpoints stay fixed
+            points[1:-1] = (points[:-2] + points[1:-1] + points[2:]) / 3
         
-        return smoothed
+        return [{"x": x, "y": y} for x, y in points.tolist()]
 
 # Example usage
 if __name__ == "__main__":
@@ -4,8 +4,40 @@ Intent classification and command parsing for voice commands
 
 import re
 from enum import Enum
+from functools import lru_cache
 from utils.logger import Logger
 
+# Single-pass keyword matching for location classification (pyahocorasick when installed)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+_NUMBER_RE = re.compile(r"(\d+)")
+
+# Follow-target keywords in one scan; a colour beats a vehicle word beats a pedestrian word
+_FOLLOW_TARGET_RE = re.compile(
+    r"(?P<color>red|blue|white|black|green|yellow)"
+    r"|(?P<vehicle>car|vehicle|truck|bus)"
+    r"|(?P<pedestrian>person|pedestrian|man|woman)"
+)
+_FOLLOW_TARGET_TYPES = (
+    ("color", "colored_vehicle"),
+    ("vehicle", "vehicle"),
+    ("pedestrian", "pedestrian"),
+)
+
+def _compile_alternatives(patterns):
+    """One case-insensitive regex trying every pattern; group "pN" wraps the N-th"""
+    return re.compile("|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns)), re.IGNORECASE)
+
+def _matched_groups(match):
+    """Capture groups of whichever pattern matched a _compile_alternatives regex"""
+    # The wrapping group closes after its inner groups, so it is the last group
+    first = match.re.groupindex[match.lastgroup]
+    end = match.re.groupindex.get(f"p{int(match.lastgroup[1:]) + 1}", match.re.groups + 1)
+    return match.groups()[first:end - 1]
+
 class Intent(Enum):
     """Supported command intents"""
     NAVIGATE = "navigate"
@@ -34,9 +66,13 @@ class LocationType(Enum):
 class CommandParser:
     """Parse voice commands and extract intent and parameters"""
     
+    PARSE_CACHE_SIZE = 128
+    
     def __init__(self):
         self.logger = Logger.get_logger(__name__)
         self._initialize_patterns()
+        # Repeated utterances ("stop", "park") skip the regex cascade
+        self._parse_cached = lru_cache(maxsize=self.PARSE_CACHE_SIZE)(self._parse_normalized)
     
     def _initialize_patterns(self):
         """Initialize regex patterns for command recognition"""
@@ -82,6 +118,51 @@ class CommandParser:
             r"chase (?:that\s+)?(.+)"
         ]
         
+        # Each intent's patterns combined into one precompiled search
+        self._navigation_re = _compile_alternatives(self.navigation_patterns)
+        self._stop_re = _compile_alternatives(self.stop_patterns)
+        self._speed_re = _compile_alternatives(self.speed_patterns)
+        self._turn_re = _compile_alternatives(self.turn_patterns)
+        self._parking_re = _compile_alternatives(self.parking_patterns)
+        self._follow_re = _compile_alternatives(self.follow_patterns)
+        
+        # Intent cascade, and for common leading words the intents they usually
+        # start, tried first (in cascade order) before the remaining ones
+        self._intent_handlers = (
+            self._try_navigation, self._try_stop, self._try_speed_change,
+            self._try_turn, self._try_parking, self._try_follow,
+        )
+        first_word_intents = {
+            "go": (self._try_navigation, self._try_speed_change, self._try_turn),
+            "drive": (self._try_navigation, self._try_speed_change),
+            "navigate": (self._try_navigation,),
+            "head": (self._try_navigation,),
+            "take": (self._try_navigation, self._try_turn),
+            "let's": (self._try_navigation, self._try_parking),
+            "i": (self._try_navigation, self._try_parking),
+            "stop": (self._try_stop,),
+            "halt": (self._try_stop,),
+            "brake": (self._try_stop,),
+            "emergency": (self._try_stop,),
+            "speed": (self._try_speed_change,),
+            "slow": (self._try_speed_change,),
+            "accelerate": (self._try_speed_change,),
+            "decelerate": (self._try_speed_change,),
+            "increase": (self._try_speed_change,),
+            "decrease": (self._try_speed_change,),
+            "set": (self._try_speed_change,),
+            "turn": (self._try_turn,),
+            "make": (self._try_turn,),
+            "park": (self._try_parking,),
+            "find": (self._try_parking,),
+            "follow": (self._try_follow,),
+            "chase": (self._try_follow,),
+        }
+        self._handler_order = {
+            word: handlers + tuple(h for h in self._intent_handlers if h not in handlers)
+            for word, handlers in first_word_intents.items()
+        }
+        
         # Location type patterns
         self.location_patterns = {
             LocationType.GAS_STATION: [
@@ -89,7 +170,7 @@ class CommandParser:
                 r"shell", r"bp", r"chevron", r"exxon", r"mobil"
             ],
             LocationType.SHOPPING_MALL: [
-                r"(?:shopping\s+)?mall", r"shopping center", r"marketplace",
+                r"mall", r"shopping center", r"marketplace",
                 r"walmart", r"target", r"costco"
             ],
             LocationType.PARKING_LOT: [
@@ -118,6 +199,22 @@ class CommandParser:
                 r"traffic light", r"red light", r"green light", r"stop light"
             ]
         }
+        
+        # All location keywords are literals, so one scan finds every match;
+        # the lowest index (dict order) wins, as with the per-type search
+        self._location_types = list(self.location_patterns)
+        if ahocorasick is not None:
+            self._location_automaton = ahocorasick.Automaton()
+            for index, patterns in enumerate(self.location_patterns.values()):
+                for keyword in patterns:
+                    self._location_automaton.add_word(keyword, index)
+            self._location_automaton.make_automaton()
+        else:
+            self._location_automaton = None
+            self._location_re = re.compile("|".join(
+                f"(?P<t{index}>{'|'.join(patterns)})"
+                for index, patterns in enumerate(self.location_patterns.values())
+            ))
     
     def parse_command(self, command_text):
         """
@@ -132,30 +229,22 @@ class CommandParser:
         command_text = command_text.lower().strip()
         self.logger.info(f"Parsing command: {command_text}")
         
-        # Try to match different intents
-        result = self._try_navigation(command_text)
-        if result:
-            return result
-        
-        result = self._try_stop(command_text)
-        if result:
-            return result
-        
-        result = self._try_speed_change(command_text)
-        if result:
-            return result
-        
-        result = self._try_turn(command_text)
-        if result:
-            return result
-        
-        result = self._try_parking(command_text)
-        if result:
-            return result
-        
-        result = self._try_follow(command_text)
-        if result:
-            return result
+        # Cached results are shared, so hand out copies of the mutable levels
+        result = self._parse_cached(command_text)
+        return dict(result, parameters=dict(result["parameters"]))
+    
+    def clear_cache(self):
+        """Drop cached parse results, e.g. after the pattern lists are reloaded"""
+        self._parse_cached.cache_clear()
+    
+    def _parse_normalized(self, command_text):
+        """Run the intent cascade on lowercased, stripped command text"""
+        # Try the intents the first word points to, then the rest in the usual order
+        first_word = command_text.split(None, 1)[0].rstrip(",.!?") if command_text else ""
+        for handler in self._handler_order.get(first_word, self._intent_handlers):
+            result = handler(command_text)
+            if result:
+                return result
         
         # Default to unknown intent
         return {
@@ -167,126 +256,122 @@ class CommandParser:
     
     def _try_navigation(self, command_text):
         """Try to match navigation patterns"""
-        for pattern in self.navigation_patterns:
-            match = re.search(pattern, command_text, re.IGNORECASE)
-            if match:
-                destination = match.group(1).strip()
-                location_type = self._classify_location(destination)
-                
-                return {
-                    "intent": Intent.NAVIGATE,
-                    "confidence": 0.9,
-                    "parameters": {
-                        "destination": destination,
-                        "location_type": location_type,
-                        "specific_location": self._extract_specific_location(destination)
-                    },
-                    "raw_command": command_text
-                }
+        match = self._navigation_re.search(command_text)
+        if match:
+            destination = _matched_groups(match)[0].strip()
+            location_type = self._classify_location(destination)
+            
+            return {
+                "intent": Intent.NAVIGATE,
+                "confidence": 0.9,
+                "parameters": {
+                    "destination": destination,
+                    "location_type": location_type,
+                    "specific_location": self._extract_specific_location(destination)
+                },
+                "raw_command": command_text
+            }
         return None
     
     def _try_stop(self, command_text):
         """Try to match stop patterns"""
-        for pattern in self.stop_patterns:
-            if re.search(pattern, command_text, re.IGNORECASE):
-                return {
-                    "intent": Intent.STOP,
-                    "confidence": 0.95,
-                    "parameters": {
-                        "immediate": "emergency" in command_text or "now" in command_text
-                    },
-                    "raw_command": command_text
-                }
+        if self._stop_re.search(command_text):
+            return {
+                "intent": Intent.STOP,
+                "confidence": 0.95,
+                "parameters": {
+                    "immediate": "emergency" in command_text or "now" in command_text
+                },
+                "raw_command": command_text
+            }
         return None
     
     def _try_speed_change(self, command_text):
         """Try to match speed change patterns"""
-        for pattern in self.speed_patterns:
-            match = re.search(pattern, command_text, re.IGNORECASE)
-            if match:
+        if self._speed_re.search(command_text):
+            speed_change = "increase"
+            target_speed = None
+            
+            if "slow" in command_text or "decrease" in command_text:
+                speed_change = "decrease"
+            elif "speed up" in command_text or "faster" in command_text:
                 speed_change = "increase"
-                target_speed = None
-                
-                if "slow" in command_text or "decrease" in command_text:
-                    speed_change = "decrease"
-                elif "speed up" in command_text or "faster" in command_text:
-                    speed_change = "increase"
-                
-                # Try to extract specific speed
-                speed_match = re.search(r"(\d+)", command_text)
-                if speed_match:
-                    target_speed = int(speed_match.group(1))
-                
-                return {
-                    "intent": Intent.SPEED_CHANGE,
-                    "confidence": 0.8,
-                    "parameters": {
-                        "change_type": speed_change,
-                        "target_speed": target_speed
-                    },
-                    "raw_command": command_text
-                }
+            
+            # Try to extract specific speed
+            speed_match = _NUMBER_RE.search(command_text)
+            if speed_match:
+                target_speed = int(speed_match.group(1))
+            
+            return {
+                "intent": Intent.SPEED_CHANGE,
+                "confidence": 0.8,
+                "parameters": {
+                    "change_type": speed_change,
+                    "target_speed": target_speed
+                },
+                "raw_command": command_text
+            }
         return None
     
     def _try_turn(self, command_text):
         """Try to match turn patterns"""
-        for pattern in self.turn_patterns:
-            match = re.search(pattern, command_text, re.IGNORECASE)
-            if match:
-                direction = match.group(1).lower()
-                location = match.group(2) if len(match.groups()) > 1 and match.group(2) else None
-                
-                return {
-                    "intent": Intent.TURN,
-                    "confidence": 0.85,
-                    "parameters": {
-                        "direction": direction,
-                        "at_location": location
-                    },
-                    "raw_command": command_text
-                }
+        match = self._turn_re.search(command_text)
+        if match:
+            groups = _matched_groups(match)
+            direction = groups[0].lower()
+            location = groups[1] if len(groups) > 1 and groups[1] else None
+            
+            return {
+                "intent": Intent.TURN,
+                "confidence": 0.85,
+                "parameters": {
+                    "direction": direction,
+                    "at_location": location
+                },
+                "raw_command": command_text
+            }
         return None
     
     def _try_parking(self, command_text):
         """Try to match parking patterns"""
-        for pattern in self.parking_patterns:
-            if re.search(pattern, command_text, re.IGNORECASE):
-                return {
-                    "intent": Intent.PARK,
-                    "confidence": 0.9,
-                    "parameters": {},
-                    "raw_command": command_text
-                }
+        if self._parking_re.search(command_text):
+            return {
+                "intent": Intent.PARK,
+                "confidence": 0.9,
+                "parameters": {},
+                "raw_command": command_text
+            }
         return None
     
     def _try_follow(self, command_text):
         """Try to match follow patterns"""
-        for pattern in self.follow_patterns:
-            match = re.search(pattern, command_text, re.IGNORECASE)
-            if match:
-                target = match.group(1).strip()
-                
-                return {
-                    "intent": Intent.FOLLOW,
-                    "confidence": 0.8,
-                    "parameters": {
-                        "target": target,
-                        "target_type": self._classify_follow_target(target)
-                    },
-                    "raw_command": command_text
-                }
+        match = self._follow_re.search(command_text)
+        if match:
+            target = _matched_groups(match)[0].strip()
+            
+            return {
+                "intent": Intent.FOLLOW,
+                "confidence": 0.8,
+                "parameters": {
+                    "target": target,
+                    "target_type": self._classify_follow_target(target)
+                },
+                "raw_command": command_text
+            }
         return None
     
     def _classify_location(self, location_text):
         """Classify the type of location"""
         location_text = location_text.lower()
         
-        for location_type, patterns in self.location_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, location_text, re.IGNORECASE):
-                    return location_type
+        if self._location_automaton is not None:
+            indices = [index for _, index in self._location_automaton.iter(location_text)]
+        else:
+            indices = [int(match.lastgroup[1:]) for match in self._location_re.finditer(location_text)]
         
-        return LocationType.UNKNOWN
+        if not indices:
+            return LocationType.UNKNOWN
+        return self._location_types[min(indices)]
     
     def _extract_specific_location(self, location_text):
         """Extract specific location details"""
@@ -304,16 +389,12 @@ class CommandParser:
     
     def _classify_follow_target(self, target_text):
         """Classify the type of follow target"""
-        target_text = target_text.lower()
+        found = {match.lastgroup for match in _FOLLOW_TARGET_RE.finditer(target_text.lower())}
         
-        if re.search(r"red|blue|white|black|green|yellow", target_text):
-            return "colored_vehicle"
-        elif re.search(r"car|vehicle|truck|bus", target_text):
-            return "vehicle"
-        elif re.search(r"person|pedestrian|man|woman", target_text):
-            return "pedestrian"
-        else:
-            return "unknown"
+        for group, target_type in _FOLLOW_TARGET_TYPES:
+            if group in found:
+                return target_type
+        return "unknown"
 
 # Example usage
 if __name__ == "__main__":
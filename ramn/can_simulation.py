@@ -6,6 +6,8 @@ Simulates automotive ECUs and CAN message types
 import time
 import threading
 import struct
+from collections import deque
+from itertools import islice
 from enum import Enum
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Callable
@@ -54,9 +56,10 @@ class ECU:
         self.can_bus = can_bus
         self.logger = Logger.get_logger(f"ECU_{ecu_type.value}")
         self.is_active = False
-        self.message_handlers = {}
+        self.message_handlers: Dict[int, Callable] = {}  # Keyed by raw message_id
         self.periodic_messages = {}
         self.thread = None
+        self._wake = threading.Event()  # Set to reschedule or stop the ECU loop early
         
     def start(self):
         """Start ECU operation"""
@@ -69,13 +72,14 @@ class ECU:
     def stop(self):
         """Stop ECU operation"""
         self.is_active = False
+        self._wake.set()
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=1)
         self.logger.info(f"ECU {self.ecu_type.value} stopped")
     
     def add_message_handler(self, message_type: MessageType, handler: Callable):
         """Add handler for incoming messages"""
-        self.message_handlers[message_type] = handler
+        self.message_handlers[message_type.value] = handler
     
     def add_periodic_message(self, message_type: MessageType, interval: float, data_func: Callable):
         """Add periodic message transmission"""
@@ -84,6 +88,7 @@ class ECU:
             'data_func': data_func,
             'last_sent': 0
         }
+        self._wake.set()
     
     def send_message(self, message_type: MessageType, data: bytes):
         """Send CAN message"""
@@ -97,32 +102,47 @@ class ECU:
     
     def handle_message(self, message: CANMessage):
         """Handle incoming CAN message"""
-        message_type = MessageType(message.message_id)
-        if message_type in self.message_handlers:
-            self.message_handlers[message_type](message)
+        handler = self.message_handlers.get(message.message_id)
+        if handler:
+            handler(message)
+    
+    def poll(self, current_time: float) -> Optional[float]:
+        """Send every periodic message that is due at current_time.
+        
+        Returns the seconds until the next message is due, or None if the
+        ECU has no periodic messages.
+        """
+        next_due = None
+        for message_type, config in self.periodic_messages.items():
+            if current_time - config['last_sent'] >= config['interval']:
+                data = config['data_func']()
+                self.send_message(message_type, data)
+                config['last_sent'] = current_time
+            due = config['last_sent'] + config['interval']
+            if next_due is None or due < next_due:
+                next_due = due
+        return None if next_due is None else max(0.0, next_due - current_time)
     
     def _run_loop(self):
-        """Main ECU execution loop"""
-        while self.is_active:
-            current_time = time.time()
-            
-            # Send periodic messages
-            for message_type, config in self.periodic_messages.items():
-                if current_time - config['last_sent'] >= config['interval']:
-                    data = config['data_func']()
-                    self.send_message(message_type, data)
-                    config['last_sent'] = current_time
-            
-            time.sleep(0.01)  # 10ms cycle
+        """Main ECU execution loop; sleeps until the next message is due"""
+        while True:
+            # Clear before checking is_active, so a stop() in between is never lost
+            self._wake.clear()
+            if not self.is_active:
+                break
+            self._wake.wait(self.poll(time.time()))
 
 class CANBus:
     """CAN Bus simulation"""
     
+    # Oldest messages fall off the log once it holds this many
+    MESSAGE_LOG_SIZE = 10000
+    
     def __init__(self):
         self.logger = Logger.get_logger(__name__)
         self.ecus: Dict[ECUType, ECU] = {}
-        self.message_log: List[CANMessage] = []
-        self.message_subscribers: Dict[MessageType, List[Callable]] = {}
+        self.message_log: deque = deque(maxlen=self.MESSAGE_LOG_SIZE)
+        self.message_subscribers: Dict[int, List[Callable]] = {}  # Keyed by raw message_id
         self.is_running = False
         self.lock = threading.Lock()
         
@@ -153,24 +173,23 @@ class CANBus:
         
         self.logger.info("CAN bus stopped")
     
+    def tick(self, current_time: float):
+        """Poll all ECUs from the caller's thread instead of their own loops"""
+        for ecu in self.ecus.values():
+            ecu.poll(current_time)
+    
     def send_message(self, message: CANMessage):
         """Send message on the bus"""
         with self.lock:
-            # Add to log
+            # Add to log; the deque drops the oldest entry when full
             self.message_log.append(message)
             
-            # Keep log size manageable
-            if len(self.message_log) > 10000:
-                self.message_log = self.message_log[-5000:]
-            
             # Notify subscribers
-            message_type = MessageType(message.message_id)
-            if message_type in self.message_subscribers:
-                for callback in self.message_subscribers[message_type]:
-                    try:
-                        callback(message)
-                    except Exception as e:
-                        self.logger.error(f"Error in message subscriber: {e}")
+            for callback in self.message_subscribers.get(message.message_id, ()):
+                try:
+                    callback(message)
+                except Exception as e:
+                    self.logger.error(f"Error in message subscriber: {e}")
             
             # Send to all ECUs except sender
             for ecu in self.ecus.values():
@@ -179,19 +198,18 @@ class CANBus:
     
     def subscribe_to_message(self, message_type: MessageType, callback: Callable):
         """Subscribe to specific message type"""
-        if message_type not in self.message_subscribers:
-            self.message_subscribers[message_type] = []
-        self.message_subscribers[message_type].append(callback)
+        self.message_subscribers.setdefault(message_type.value, []).append(callback)
     
     def get_recent_messages(self, message_type: Optional[MessageType] = None, count: int = 100):
         """Get recent messages"""
         with self.lock:
+            newest_first = reversed(self.message_log)
             if message_type:
-                filtered = [msg for msg in self.message_log 
-                           if msg.message_id == message_type.value]
-                return filtered[-count:]
-            else:
-                return self.message_log[-count:]
+                newest_first = (msg for msg in newest_first
+                                if msg.message_id == message_type.value)
+            recent = list(islice(newest_first, count))
+        recent.reverse()
+        return recent
 
 class VehicleCANSimulator:
     """Complete vehicle CAN bus simulator"""
@@ -209,6 +227,7 @@ class VehicleCANSimulator:
             'brake_pressure': 0.0,
             'steering_angle': 0.0
         }
+        self.clock = 0.0
         
         self._setup_ecus()
     
@@ -279,6 +298,15 @@ class VehicleCANSimulator:
         self.can_bus.stop()
         self.logger.info("Vehicle CAN simulation stopped")
     
+    def tick(self, dt: float):
+        """Advance the simulation clock by dt seconds without ECU threads.
+        
+        Use this instead of start() when a host loop (e.g. a Qt timer)
+        already runs at a fixed rate.
+        """
+        self.clock += dt
+        self.can_bus.tick(self.clock)
+    
     def update_vehicle_state(self, **kwargs):
         """Update vehicle state parameters"""
         for key, value in kwargs.items():
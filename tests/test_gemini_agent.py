@@ -3,6 +3,7 @@ Test cases for Gemini Agent
 """
 
 import unittest
+import asyncio
 import json
 from unittest.mock import Mock, patch, MagicMock
 
@@ -48,6 +49,15 @@ class TestGeminiAgent(unittest.TestCase):
         self.assertEqual(parsed["destination"], "gas station")
         self.assertFalse(parsed["clarification_needed"])
     
+    def test_parse_response_surrounding_text(self):
+        """Test parsing JSON embedded in prose that contains braces"""
+        response_text = 'Sure! {"action": "stop", "response": "Stopping {now}"} Anything else? {}'
+
+        parsed = self.agent._parse_response(response_text)
+
+        self.assertEqual(parsed["action"], "stop")
+        self.assertEqual(parsed["response"], "Stopping {now}")
+
     def test_parse_response_invalid_json(self):
         """Test parsing invalid JSON response"""
         response_text = "This is not JSON"
@@ -57,6 +67,63 @@ class TestGeminiAgent(unittest.TestCase):
         self.assertEqual(parsed["action"], "clarify")
         self.assertTrue(parsed["clarification_needed"])
     
+    def test_process_command_async_gemini(self):
+        """Test the coroutine path awaits the async Gemini call"""
+        self.agent.model = MagicMock()
+        reply = Mock(text='{"action": "wait", "response": "Waiting here"}')
+        async def generate_content_async(prompt):
+            return reply
+        self.agent.model.generate_content_async = generate_content_async
+        
+        response = asyncio.run(self.agent.process_command_async("hmm, hold on a moment"))
+        
+        self.assertEqual(response["action"], "wait")
+        self.agent.model.generate_content.assert_not_called()
+    
+    def test_process_command_reuses_cached_response(self):
+        """Test a repeated utterance skips parsing and Gemini"""
+        self.agent.model = MagicMock()
+        self.agent.model.generate_content.return_value = Mock(
+            text='{"action": "wait", "response": "Waiting here"}'
+        )
+        
+        first = self.agent.process_command("hmm, hold on a moment", {"speed": 31})
+        second = self.agent.process_command("  Hmm, hold on a moment", {"speed": 29})
+        
+        self.assertEqual(first, second)
+        self.assertEqual(self.agent.model.generate_content.call_count, 1)
+        self.assertEqual(len(self.agent.get_conversation_history()), 2)
+    
+    def test_cached_response_is_independent_copy(self):
+        """Test mutating a returned response does not change later cache hits"""
+        self.agent.model = MagicMock()
+        self.agent.model.generate_content.return_value = Mock(
+            text='{"action": "wait", "parameters": {"seconds": 5}, "response": "Waiting"}'
+        )
+        
+        first = self.agent.process_command("hmm, hold on a moment")
+        first["parameters"]["seconds"] = 60
+        second = self.agent.process_command("hmm, hold on a moment")
+        second["parameters"]["seconds"] = 90
+        third = self.agent.process_command("hmm, hold on a moment")
+        
+        self.assertEqual(third["parameters"], {"seconds": 5})
+    
+    def test_clarify_response_not_cached(self):
+        """Test a malformed Gemini reply is retried instead of cached"""
+        self.agent.model = MagicMock()
+        self.agent.model.generate_content.side_effect = [
+            Mock(text='{broken json'),
+            Mock(text='{"action": "wait", "response": "Waiting here"}'),
+        ]
+        
+        first = self.agent.process_command("hmm, hold on a moment")
+        second = self.agent.process_command("hmm, hold on a moment")
+        
+        self.assertEqual(first["action"], "clarify")
+        self.assertEqual(second["action"], "wait")
+        self.assertEqual(self.agent.model.generate_content.call_count, 2)
+    
     def test_get_error_response(self):
         """Test error response generation"""
         error_response = self.agent._get_error_response()
@@ -71,6 +71,22 @@ class TestCommandParser(unittest.TestCase):
         self.assertEqual(result["intent"], Intent.UNKNOWN)
         self.assertEqual(result["confidence"], 0.0)
     
+    def test_first_word_intent_preferred(self):
+        """Test the leading word's intent wins over later matches"""
+        result = self.parser.parse_command("Stop, then drive to the mall")
+        
+        self.assertEqual(result["intent"], Intent.STOP)
+    
+    def test_repeated_command_uses_cache(self):
+        """Test repeated commands reuse the cached parse without sharing state"""
+        first = self.parser.parse_command("Turn left at the intersection")
+        first["parameters"]["direction"] = "right"
+        
+        second = self.parser.parse_command("  turn LEFT at the intersection ")
+        
+        self.assertEqual(second["parameters"]["direction"], "left")
+        self.assertEqual(self.parser._parse_cached.cache_info().hits, 1)
+    
     def test_location_classification(self):
         """Test location type classification"""
         test_cases = [
@@ -0,0 +1,158 @@
+"""
+Test cases for A* pathfinding
+"""
+
+import unittest
+from unittest.mock import patch
+from navigation import pathfinding
+from navigation.pathfinding import AStarPathfinder
+
+class TestAStarPathfinder(unittest.TestCase):
+    """Test cases for AStarPathfinder class"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.pathfinder = AStarPathfinder(grid_size=1.0)
+    
+    def _assert_connected(self, path):
+        """Consecutive waypoints must be one grid step apart"""
+        for a, b in zip(path, path[1:]):
+            self.assertLessEqual(abs(a["x"] - b["x"]), 1)
+            self.assertLessEqual(abs(a["y"] - b["y"]), 1)
+    
+    def test_open_diagonal_path(self):
+        """Test an unobstructed diagonal route is the direct one"""
+        path = self.pathfinder.find_path((0, 0), (10, 10))
+        
+        self.assertEqual(len(path), 11)
+        self.assertEqual(path[0], {"x": 0, "y": 0})
+        self.assertEqual(path[-1], {"x": 10, "y": 10})
+    
+    def test_clear_line_path(self):
+        """Test an unobstructed route follows the straight grid line"""
+        self.pathfinder.add_obstacle((0, 5))
+        
+        path = self.pathfinder.find_path((0, 0), (10, -3))
+        
+        self.assertEqual(len(path), 11)
+        self.assertEqual(path[-1], {"x": 10, "y": -3})
+        self._assert_connected(path)
+    
+    def test_path_avoids_obstacles(self):
+        """Test the route goes around a wall"""
+        wall = [(5, y) for y in range(-3, 9)]
+        self.pathfinder.add_obstacles(wall)
+        
+        path = self.pathfinder.find_path((0, 0), (10, 0))
+        
+        self.assertEqual(path[0], {"x": 0, "y": 0})
+        self.assertEqual(path[-1], {"x": 10, "y": 0})
+        self._assert_connected(path)
+        for waypoint in path:
+            self.assertNotIn((waypoint["x"], waypoint["y"]), wall)
+    
+    def test_replan_reuses_backward_search(self):
+        """Test a new start already closed by the last search reuses its routes"""
+        wall = [(5, y) for y in range(-3, 9)]
+        self.pathfinder.add_obstacles(wall)
+        path = self.pathfinder.find_path((0, 0), (10, 0))
+        next_start = (path[1]["x"], path[1]["y"])
+        self.assertIn(next_start, self.pathfinder._goal_cache.closed)
+        
+        replanned = self.pathfinder.find_path(next_start, (10, 0))
+        
+        fresh = AStarPathfinder(grid_size=1.0)
+        fresh.add_obstacles(wall)
+        self.assertEqual(replanned, path[1:])
+        self.assertAlmostEqual(self._path_cost(replanned),
+                               self._path_cost(fresh.find_path(next_start, (10, 0))))
+    
+    def test_path_cache_invalidated_by_obstacles(self):
+        """Test repeated queries reuse the cached route until obstacles change"""
+        first = self.pathfinder.find_path((0, 0), (10, 10))
+        first.append({"x": 99, "y": 99})
+        first[0]["x"] = 42
+        
+        second = self.pathfinder.find_path((0, 0), (10, 10))
+        self.assertEqual(len(second), 11)
+        self.assertEqual(second[0], {"x": 0, "y": 0})
+        
+        self.pathfinder.add_obstacle((5, 5))
+        rerouted = self.pathfinder.find_path((0, 0), (10, 10))
+        
+        self.assertNotIn({"x": 5, "y": 5}, rerouted)
+    
+    def test_start_on_obstacle(self):
+        """Test a start cell inside an obstacle still finds a route out"""
+        self.pathfinder.add_obstacles([(0, 0), (3, 1), (3, 0), (3, -1)])
+        
+        path = self.pathfinder.find_path((0, 0), (6, 0))
+        
+        self.assertEqual(path[0], {"x": 0, "y": 0})
+        self.assertEqual(path[-1], {"x": 6, "y": 0})
+        self._assert_connected(path)
+    
+    def test_dense_grid_matches_python_search(self):
+        """Test the dense-grid kernel finds a route as short as the Python search"""
+        wall = [(5, y) for y in range(-3, 9)] + [(x, 8) for x in range(0, 6)]
+        self.pathfinder.add_obstacles(wall)
+        start, goal = (0, 0), (10, 0)
+        
+        path = self.pathfinder.find_path(start, goal)
+        bounds = self.pathfinder._dense_bounds(start, goal)
+        origin, obstacle_map = bounds[:2], self.pathfinder._dense_obstacle_grid(bounds)
+        dense_path = self.pathfinder._find_path_dense(start, goal, origin, obstacle_map)
+        
+        self.assertEqual(dense_path[0], path[0])
+        self.assertEqual(dense_path[-1], path[-1])
+        self._assert_connected(dense_path)
+        self.assertAlmostEqual(self._path_cost(dense_path), self._path_cost(path))
+        for waypoint in dense_path:
+            self.assertNotIn((waypoint["x"], waypoint["y"]), wall)
+    
+    def test_specialized_kernel_uses_fixed_map(self):
+        """Test a search inside a specialized map runs on the whole fixed-size grid"""
+        wall = [(5, y) for y in range(-3, 9)]
+        self.pathfinder.add_obstacles(wall)
+        self.pathfinder.specialize(40, 30, origin=(-10, -10))
+        start, goal = (0, 0), (10, 0)
+        
+        bounds = self.pathfinder._dense_bounds(start, goal)
+        origin, obstacle_map = bounds[:2], self.pathfinder._dense_obstacle_grid(bounds)
+        path = self.pathfinder._find_path_dense(start, goal, origin, obstacle_map)
+        
+        self.assertEqual(origin, (-10, -10))
+        self.assertEqual(obstacle_map.shape, (40, 30))
+        self.assertEqual(path[-1], {"x": 10, "y": 0})
+        self._assert_connected(path)
+        self.assertAlmostEqual(self._path_cost(path),
+                               self._path_cost(self.pathfinder.find_path(start, goal)))
+    
+    def test_sparse_obstacles_skip_dense_grid(self):
+        """Test widely separated obstacles use the Python search instead of a huge grid"""
+        self.pathfinder.add_obstacles([(5, y) for y in range(-3, 4)] + [(100000, 100000)])
+        
+        with patch.object(pathfinding, "NUMBA_AVAILABLE", True):
+            path = self.pathfinder.find_path((0, 0), (10, 0))
+        
+        self.assertIsNone(self.pathfinder._obstacle_grid)
+        self.assertEqual(path[-1], {"x": 10, "y": 0})
+        self._assert_connected(path)
+    
+    def _path_cost(self, path):
+        """Sum of step lengths along a path"""
+        return sum(((a["x"] - b["x"]) ** 2 + (a["y"] - b["y"]) ** 2) ** 0.5
+                   for a, b in zip(path, path[1:]))
+    
+    def test_smooth_path_keeps_endpoints(self):
+        """Test smoothing leaves start and goal in place"""
+        path = [{"x": 0, "y": 0}, {"x": 1, "y": 3}, {"x": 2, "y": 0}, {"x": 3, "y": 0}]
+        
+        smoothed = self.pathfinder.smooth_path(path, iterations=1)
+        
+        self.assertEqual(smoothed[0], path[0])
+        self.assertEqual(smoothed[-1], path[-1])
+        self.assertAlmostEqual(smoothed[1]["y"], 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
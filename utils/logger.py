@@ -2,7 +2,10 @@
 Logging utilities for CARLA Voice Commander
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -13,6 +16,7 @@ class Logger:
     
     _loggers = {}
     _configured = False
+    _listener = None
     
     @classmethod
     def setup_logging(cls):
@@ -41,11 +45,19 @@ class Logger:
         file_handler.setFormatter(formatter)
         file_handler.setLevel(logging.DEBUG)
         
+        # Hand records to a background listener so callers (e.g. simulation
+        # control loops) never block on console or file I/O
+        log_queue = queue.SimpleQueue()
+        cls._listener = logging.handlers.QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        cls._listener.start()
+        atexit.register(cls._listener.stop)
+        
         # Configure root logger
         root_logger = logging.getLogger()
         root_logger.setLevel(logging.DEBUG)
-        root_logger.addHandler(console_handler)
-        root_logger.addHandler(file_handler)
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
         
         cls._configured = True
     
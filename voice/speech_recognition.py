@@ -18,6 +18,7 @@ class SpeechRecognizer:
         self.is_listening = False
         self.listen_thread = None
         self.callback = None
+        self._stop_event = threading.Event()  # Wakes the listen loop's retry pause on stop
         
         # Calibrate microphone
         self._calibrate_microphone()
@@ -40,6 +41,7 @@ class SpeechRecognizer:
         
         self.callback = callback
         self.is_listening = True
+        self._stop_event.clear()
         self.listen_thread = threading.Thread(target=self._listen_loop)
         self.listen_thread.daemon = True
         self.listen_thread.start()
@@ -49,6 +51,7 @@ class SpeechRecognizer:
     def stop_listening(self):
         """Stop continuous speech recognition"""
         self.is_listening = False
+        self._stop_event.set()
         if self.listen_thread and self.listen_thread.is_alive():
             self.listen_thread.join(timeout=2)
         
@@ -73,7 +76,7 @@ class SpeechRecognizer:
                 continue
             except Exception as e:
                 self.logger.error(f"Error in listen loop: {e}")
-                time.sleep(1)  # Brief pause before retrying
+                self._stop_event.wait(1)  # Brief pause before retrying, cut short by stop
     
     def _recognize_speech(self, audio):
         """Recognize speech from audio data"""
@@ -3,27 +3,48 @@
 Main interface for controlling vehicles in Webots simulator
 """
 
-import sys
-import os
 import time
 import math
-import threading
-from typing import Dict, Any, Optional
+import numpy as np
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
 
 # Import Webots controller
 try:
-    from controller import Robot, Motor, Camera, GPS, Compass, DistanceSensor
+    from controller import Robot
     WEBOTS_AVAILABLE = True
     print("✅ Webots controller available")
 except ImportError:
     WEBOTS_AVAILABLE = False
     print("❌ Webots controller not available - install Webots and webots-controller package")
 
-from config import Config
 from utils.logger import Logger
 from gemini_agent import GeminiAgent
 from ramn.can_simulation import VehicleCANSimulator
 
+# Differential drive geometry
+WHEEL_RADIUS = 0.2  # meters
+WHEEL_SEPARATION = 1.0  # meters
+_INV_WHEEL_RADIUS = 1.0 / WHEEL_RADIUS
+_HALF_WHEEL_SEPARATION = WHEEL_SEPARATION / 2
+
+# GPS is sampled every Nth step; position barely moves within one timestep
+GPS_SAMPLING_STEPS = 4
+
+def _wheel_speeds(linear_velocity: float, angular_velocity: float) -> Tuple[float, float]:
+    """Convert body velocities (m/s, rad/s) to left/right wheel speeds (rad/s)"""
+    wheel_offset = angular_velocity * _HALF_WHEEL_SEPARATION
+    return ((linear_velocity - wheel_offset) * _INV_WHEEL_RADIUS,
+            (linear_velocity + wheel_offset) * _INV_WHEEL_RADIUS)
+
+def _gear_for(linear_velocity: float) -> str:
+    """Gear implied by the commanded direction of travel"""
+    if linear_velocity > 0.1:
+        return 'D'
+    if linear_velocity < -0.1:
+        return 'R'
+    return 'P'
+
 class WebotsVehicleController:
     """Webots vehicle controller with sensor integration"""
     
@@ -34,11 +55,14 @@ class WebotsVehicleController:
         if WEBOTS_AVAILABLE:
             self.robot = Robot()
             self.timestep = int(self.robot.getBasicTimeStep())
-            self._init_sensors()
-            self._init_actuators()
+            # stepBegin/stepEnd (Webots R2023b+) let us overlap our work with the simulation step
+            self._split_step = hasattr(self.robot, 'stepBegin')
         else:
             self.robot = None
             self.timestep = 64
+            self._split_step = False
+        self._init_sensors()
+        self._init_actuators()
         
         # Vehicle state
         self.vehicle_state = {
@@ -50,12 +74,17 @@ class WebotsVehicleController:
             'engine_rpm': 0,
             'fuel_level': 1.0
         }
+        # Nested dicts written every step; mutated in place, never replaced
+        self._position = self.vehicle_state['position']
+        self._orientation = self.vehicle_state['orientation']
         
         # Control parameters
         self.max_speed = 30.0  # m/s
         self.max_steering_angle = 0.5  # radians
         self.current_speed = 0.0
         self.current_steering = 0.0
+        # Set when the commanded speed changes; gear is re-derived on the next step
+        self._gear_dirty = False
         
         # Initialize AI and CAN
         self.gemini_agent = GeminiAgent()
@@ -66,6 +95,20 @@ class WebotsVehicleController:
     
     def _init_sensors(self):
         """Initialize Webots sensors"""
+        self.gps = None
+        self.compass = None
+        self.camera = None
+        
+        # Bound sensor readers, cached so update_sensors avoids attribute lookups
+        self._gps_get = None
+        self._compass_get = None
+        self._sensor_step = 0
+        self.distance_sensors = {}
+        self._distance_gets = ()
+        self._distance_names = ()
+        # Latest distance readings, indexed like _distance_names
+        self.obstacle_distances = np.empty(0)
+        
         if not self.robot:
             return
         
@@ -73,13 +116,15 @@ class WebotsVehicleController:
             # GPS for position tracking
             self.gps = self.robot.getDevice('gps')
             if self.gps:
-                self.gps.enable(self.timestep)
+                self.gps.enable(self.timestep * GPS_SAMPLING_STEPS)
+                self._gps_get = self.gps.getValues
                 self.logger.info("GPS sensor enabled")
             
             # Compass for orientation
             self.compass = self.robot.getDevice('compass')
             if self.compass:
                 self.compass.enable(self.timestep)
+                self._compass_get = self.compass.getValues
                 self.logger.info("Compass sensor enabled")
             
             # Camera for vision
@@ -97,12 +142,22 @@ class WebotsVehicleController:
                     sensor.enable(self.timestep)
                     self.distance_sensors[name] = sensor
                     self.logger.info(f"Distance sensor {name} enabled")
+            self._distance_names = tuple(self.distance_sensors)
+            self._distance_gets = tuple(sensor.getValue for sensor in self.distance_sensors.values())
+            self.obstacle_distances = np.full(len(self._distance_gets), np.inf)
             
         except Exception as e:
             self.logger.error(f"Failed to initialize sensors: {e}")
     
     def _init_actuators(self):
         """Initialize Webots actuators"""
+        # Missing devices stay None so callers need no hasattr checks
+        self.left_motor = None
+        self.right_motor = None
+        self.steering_motor = None
+        # Bound (left, right) wheel velocity setters, empty until both motors exist
+        self._wheel_setters = ()
+        
         if not self.robot:
             return
         
@@ -116,6 +171,7 @@ class WebotsVehicleController:
                 self.right_motor.setPosition(float('inf'))
                 self.left_motor.setVelocity(0.0)
                 self.right_motor.setVelocity(0.0)
+                self._wheel_setters = (self.left_motor.setVelocity, self.right_motor.setVelocity)
                 self.logger.info("Wheel motors initialized")
             
             # Steering motor (for car-like vehicles)
@@ -132,47 +188,50 @@ class WebotsVehicleController:
         if not self.robot:
             return
         
-        try:
-            # Update GPS position
-            if hasattr(self, 'gps') and self.gps:
-                gps_values = self.gps.getValues()
-                if gps_values:
-                    self.vehicle_state['position'] = {
-                        'x': gps_values[0],
-                        'y': gps_values[1], 
-                        'z': gps_values[2]
-                    }
-            
-            # Update compass orientation
-            if hasattr(self, 'compass') and self.compass:
-                compass_values = self.compass.getValues()
-                if compass_values:
-                    # Calculate yaw from compass
-                    yaw = math.atan2(compass_values[0], compass_values[1])
-                    self.vehicle_state['orientation']['yaw'] = yaw
-            
-            # Update distance sensors
-            sensor_readings = {}
-            for name, sensor in self.distance_sensors.items():
-                sensor_readings[name] = sensor.getValue()
-            
-            # Calculate speed (simplified)
-            self.vehicle_state['speed_kmh'] = abs(self.current_speed) * 3.6
-            
-            # Update CAN simulator with current state
-            self.can_simulator.update_vehicle_state(
-                speed=self.vehicle_state['speed_kmh'],
-                gear=self.vehicle_state['gear'],
-                engine_rpm=int(abs(self.current_speed) * 1000),
-                fuel_level=self.vehicle_state['fuel_level']
-            )
-            
-        except Exception as e:
-            self.logger.error(f"Failed to update sensors: {e}")
+        self._sensor_step += 1
+        
+        # Update GPS position in place, only on steps where it was sampled
+        if self._gps_get and self._sensor_step % GPS_SAMPLING_STEPS == 0:
+            gps_values = self._gps_get()
+            if gps_values:
+                position = self._position
+                position['x'] = gps_values[0]
+                position['y'] = gps_values[1]
+                position['z'] = gps_values[2]
+        
+        # Update compass orientation
+        if self._compass_get:
+            compass_values = self._compass_get()
+            if compass_values:
+                # Calculate yaw from compass
+                yaw = math.atan2(compass_values[0], compass_values[1])
+                self._orientation['yaw'] = yaw
+        
+        # Update distance sensors into the preallocated buffer
+        distances = self.obstacle_distances
+        for i, get_value in enumerate(self._distance_gets):
+            distances[i] = get_value()
+        
+        # Calculate speed (simplified)
+        state = self.vehicle_state
+        if self._gear_dirty:
+            state['gear'] = _gear_for(self.current_speed)
+            self._gear_dirty = False
+        abs_speed = abs(self.current_speed)
+        speed_kmh = abs_speed * 3.6
+        state['speed_kmh'] = speed_kmh
+        
+        # Update CAN simulator with current state
+        self.can_simulator.update_vehicle_state(
+            speed=speed_kmh,
+            gear=state['gear'],
+            engine_rpm=int(abs_speed * 1000),
+            fuel_level=state['fuel_level']
+        )
     
     def set_velocity(self, linear_velocity: float, angular_velocity: float = 0.0):
         """Set vehicle velocity"""
-        if not self.robot or not hasattr(self, 'left_motor') or not hasattr(self, 'right_motor'):
+        if not self._wheel_setters:
             self.logger.warning("Motors not available")
             return
         
@@ -182,26 +241,15 @@ class WebotsVehicleController:
             angular_velocity = max(-2.0, min(2.0, angular_velocity))
             
             # Differential drive calculation
-            wheel_radius = 0.2  # meters
-            wheel_separation = 1.0  # meters
-            
-            left_speed = (linear_velocity - angular_velocity * wheel_separation / 2) / wheel_radius
-            right_speed = (linear_velocity + angular_velocity * wheel_separation / 2) / wheel_radius
-            
-            self.left_motor.setVelocity(left_speed)
-            self.right_motor.setVelocity(right_speed)
+            set_left, set_right = self._wheel_setters
+            left_speed, right_speed = _wheel_speeds(linear_velocity, angular_velocity)
+            set_left(left_speed)
+            set_right(right_speed)
             
             self.current_speed = linear_velocity
             self.vehicle_state['velocity']['linear'] = linear_velocity
             self.vehicle_state['velocity']['angular'] = angular_velocity
-            
-            # Update gear based on direction
-            if linear_velocity > 0.1:
-                self.vehicle_state['gear'] = 'D'
-            elif linear_velocity < -0.1:
-                self.vehicle_state['gear'] = 'R'
-            else:
-                self.vehicle_state['gear'] = 'P'
+            self._gear_dirty = True
             
             self.logger.info(f"Velocity set: linear={linear_velocity:.2f}, angular={angular_velocity:.2f}")
             
@@ -210,7 +258,7 @@ class WebotsVehicleController:
     
     def set_steering(self, angle: float):
         """Set steering angle (for car-like vehicles)"""
-        if not hasattr(self, 'steering_motor') or not self.steering_motor:
+        if not self.steering_motor:
             return
         
         try:
@@ -280,17 +328,10 @@ class WebotsVehicleController:
             'position': self.vehicle_state['position'],
             'orientation': self.vehicle_state['orientation'],
             'speed': self.vehicle_state['speed_kmh'],
-            'obstacles': {}
+            # Distance sensor readings from the last update_sensors call
+            'obstacles': dict(zip(self._distance_names, self.obstacle_distances.tolist()))
         }
         
-        # Add distance sensor readings
-        for name, sensor in self.distance_sensors.items():
-            try:
-                distance = sensor.getValue()
-                summary['obstacles'][name] = distance
-            except:
-                summary['obstacles'][name] = float('inf')
-        
         return summary
     
     def _execute_ai_action(self, ai_response: Dict[str, Any]):
@@ -329,6 +370,13 @@ class WebotsVehicleController:
     
     def step(self):
         """Single simulation step"""
+        if self._split_step:
+            # Process sensors while Webots advances the simulation
+            if self.robot.stepBegin(self.timestep) == -1:
+                return False  # Simulation ended
+            self.update_sensors()
+            return self.robot.stepEnd() != -1
+        
         if self.robot:
             result = self.robot.step(self.timestep)
             if result == -1:
@@ -366,7 +414,7 @@ class WebotsVehicleController:
     
     def get_camera_image(self) -> Optional[bytes]:
         """Get current camera image"""
-        if hasattr(self, 'camera') and self.camera:
+        if self.camera:
             try:
                 return self.camera.getImage()
             except:
@@ -384,27 +432,27 @@ def main():
     
     controller = WebotsVehicleController()
     
+    # Demo schedule of (step, message, action, args), consumed in step order
+    demo_schedule = deque([
+        (0, "Testing forward movement...", controller.move_forward, (15.0,)),
+        (50, "Testing turn...", controller.turn_left, ()),
+        (80, "Testing stop...", controller.emergency_stop, ()),
+    ])
+    
     try:
-        # Test basic movements
-        print("Testing forward movement...")
-        controller.move_forward(15.0)
-        
-        # Run for a few seconds
-        for _ in range(50):
-            if not controller.step():
-                break
-            time.sleep(0.1)
-        
-        print("Testing turn...")
-        controller.turn_left()
-        
-        for _ in range(30):
+        step_count = 0
+        while demo_schedule:
+            if demo_schedule[0][0] == step_count:
+                _, message, action, args = demo_schedule.popleft()
+                print(message)
+                action(*args)
+                if not demo_schedule:
+                    break
+            
             if not controller.step():
                 break
             time.sleep(0.1)
-        
-        print("Testing stop...")
-        controller.emergency_stop()
+            step_count += 1
         
         print("✅ Basic tests completed")
         
@@ -5,6 +5,7 @@ Transparent overlay GUI for controlling Webots vehicle simulation
 
 import sys
 import os
+import re
 import time
 import math
 import threading
@@ -31,6 +32,18 @@ except ImportError:
     GeminiAgent = None
     GEMINI_AVAILABLE = False
 
+# Offline command fallback: keyword -> (priority, command), lower priority wins
+_FALLBACK_COMMANDS = {
+    'forward': (0, {'action': 'move_forward', 'speed': 25}),
+    'ahead': (0, {'action': 'move_forward', 'speed': 25}),
+    'back': (1, {'action': 'move_backward', 'speed': 15}),
+    'reverse': (1, {'action': 'move_backward', 'speed': 15}),
+    'left': (2, {'action': 'turn_left'}),
+    'right': (3, {'action': 'turn_right'}),
+    'stop': (4, {'action': 'stop'}),
+}
+_FALLBACK_PATTERN = re.compile('|'.join(_FALLBACK_COMMANDS))
+
 class WebotsControllerInterface(QObject):
     """Interface to communicate with Webots controller"""
     
@@ -230,21 +243,13 @@ class WebotsControllerInterface(QObject):
             self.logger.warning("Gemini AI not available - using simple command parsing")
             # Simple fallback command processing
             command_text = command_text.lower()
-            if 'forward' in command_text or 'ahead' in command_text:
-                command = {'action': 'move_forward', 'speed': 25}
-            elif 'back' in command_text or 'reverse' in command_text:
-                command = {'action': 'move_backward', 'speed': 15}
-            elif 'left' in command_text:
-                command = {'action': 'turn_left'}
-            elif 'right' in command_text:
-                command = {'action': 'turn_right'}
-            elif 'stop' in command_text:
-                command = {'action': 'stop'}
-            else:
+            keywords = _FALLBACK_PATTERN.findall(command_text)
+            if not keywords:
                 self.logger.warning(f"Unknown command: {command_text}")
                 return
             
-            self.send_command(command)
+            keyword = min(keywords, key=lambda k: _FALLBACK_COMMANDS[k][0])
+            self.send_command(dict(_FALLBACK_COMMANDS[keyword][1]))
             return
         
         # Get AI response
@@ -658,6 +663,10 @@ class StatusOverlay(QFrame):
             self.status_labels[key] = label
             status_layout.addWidget(label)
         
+        # Last text shown per label, so unchanged fields skip setText
+        self._label_texts = dict(status_items)
+        self._connected = None
+        
         status_group.setLayout(status_layout)
         layout.addWidget(status_group)
         
@@ -681,18 +690,26 @@ class StatusOverlay(QFrame):
         pos = vehicle_state.get('position', {})
         orientation = vehicle_state.get('orientation', {})
         
-        self.status_labels["speed"].setText(f"⚡ Speed: {vehicle_state.get('speed_kmh', 0):.1f} km/h")
-        self.status_labels["position"].setText(f"📍 Position: ({pos.get('x', 0):.1f}, {pos.get('y', 0):.1f})")
-        self.status_labels["orientation"].setText(f"🧭 Heading: {orientation.get('yaw', 0):.0f}°")
-        self.status_labels["gear"].setText(f"⚙️ Gear: {vehicle_state.get('gear', 'P')}")
-        self.status_labels["rpm"].setText(f"🔧 RPM: {vehicle_state.get('engine_rpm', 0)}")
-        
-        if vehicle_state.get('connected', False):
-            self.status_labels["connection"].setText("🟢 Status: Connected")
-            self.status_labels["connection"].setStyleSheet("color: green;")
-        else:
-            self.status_labels["connection"].setText("🔴 Status: Disconnected")
-            self.status_labels["connection"].setStyleSheet("color: red;")
+        texts = (
+            ("speed", "⚡ Speed: %.1f km/h" % vehicle_state.get('speed_kmh', 0)),
+            ("position", "📍 Position: (%.1f, %.1f)" % (pos.get('x', 0), pos.get('y', 0))),
+            ("orientation", "🧭 Heading: %.0f°" % orientation.get('yaw', 0)),
+            ("gear", "⚙️ Gear: %s" % vehicle_state.get('gear', 'P')),
+        )
+        for key, text in texts:
+            if self._label_texts[key] != text:
+                self.status_labels[key].setText(text)
+                self._label_texts[key] = text
+        
+        connected = bool(vehicle_state.get('connected', False))
+        if connected != self._connected:
+            self._connected = connected
+            if connected:
+                self.status_labels["connection"].setText("🟢 Status: Connected")
+                self.status_labels["connection"].setStyleSheet("color: green;")
+            else:
+                self.status_labels["connection"].setText("🔴 Status: Disconnected")
+                self.status_labels["connection"].setStyleSheet("color: red;")
 
 class WebotsOverlayApp(QMainWindow):
     """Main application window"""